@@ -1,3 +1,25 @@
-from . import firstrun
-from . import config
-from . import event
+import time
+
+try:
+    from aqt import mw
+except ImportError:
+    # Outside Anki, only Qt-free modules such as `core` and `codec` can be imported
+    mw = None
+
+_import_start = time.perf_counter()
+
+
+def open_config() -> bool:
+    """Config window and its dependencies are only imported when it is first opened."""
+    from .config import conf
+
+    conf.open_config()
+    return True
+
+
+if mw is not None:
+    from . import firstrun
+    from . import event
+
+    mw.addonManager.setConfigAction(__name__, open_config)
+    event.latency.import_ms = (time.perf_counter() - _import_start) * 1000
@@ -0,0 +1,144 @@
+"""Parses and builds hotkey strings, e.g. `q_press_left_click_right`.
+
+A hotkey is parsed into side, pressed buttons bitmask and trigger,
+which pack into a single int key used by the dispatch table.
+Doesn't depend on Qt, so it can be used anywhere.
+"""
+
+from typing import List, NamedTuple, Optional, Tuple
+from functools import lru_cache
+
+# Bit of each button in pressed buttons bitmask is `1 << index`, same as Qt's flag values
+BUTTONS = ["left", "right", "middle", "xbutton1", "xbutton2"]
+BUTTON_BITS = {name: 1 << i for i, name in enumerate(BUTTONS)}
+BUTTON_MASK = (1 << len(BUTTONS)) - 1
+
+# Order is used by StrokeRecognizer
+GESTURE_DIRS = ["up", "down", "left", "right"]
+# Trigger is the index in this list. Click triggers are the index of the clicked button,
+# plus len(BUTTONS) for each additional click in multi-click triggers.
+TRIGGER_NAMES = (
+    [("click", b) for b in BUTTONS]
+    + [("doubleclick", b) for b in BUTTONS]
+    + [("tripleclick", b) for b in BUTTONS]
+    + [("wheel", "up"), ("wheel", "down")]
+    + [("gesture", d) for d in GESTURE_DIRS]
+)
+TRIGGERS = {name: trigger for (trigger, name) in enumerate(TRIGGER_NAMES)}
+TRIGGER_DOUBLECLICK = len(BUTTONS)
+TRIGGER_WHEEL_UP = TRIGGERS[("wheel", "up")]
+TRIGGER_WHEEL_DOWN = TRIGGERS[("wheel", "down")]
+TRIGGER_GESTURE_UP = TRIGGERS[("gesture", "up")]
+MODES = ["press"] + list(dict.fromkeys(mode for mode, _ in TRIGGER_NAMES))
+
+# Int key is: side, then pressed buttons bitmask, then trigger.
+TRIGGER_BITS = 5
+SIDE_SHIFT = TRIGGER_BITS + len(BUTTONS)
+TRIGGER_MASK = (1 << TRIGGER_BITS) - 1
+SIDE_NAMES = ["q", "a", "x"]
+SIDE_Q = 0
+SIDE_A = 1 << SIDE_SHIFT
+SIDE_X = 2 << SIDE_SHIFT  # transition, never has shortcuts
+SIDE_KEYS = {"q": SIDE_Q, "a": SIDE_A}
+# All keys are smaller than this
+KEY_SPACE = 4 << SIDE_SHIFT
+# Separates steps of a sequence hotkey, e.g. `q_click_xbutton1_then_wheel_down`
+SEQUENCE_SEP = "_then_"
+
+
+class Hotkey(NamedTuple):
+    # index in SIDE_NAMES
+    side: int
+    press: int
+    trigger: int
+
+    @property
+    def key(self) -> int:
+        return self.side << SIDE_SHIFT | self.press << TRIGGER_BITS | self.trigger
+
+    @classmethod
+    def from_key(cls, key: int) -> "Hotkey":
+        return cls(
+            key >> SIDE_SHIFT, key >> TRIGGER_BITS & BUTTON_MASK, key & TRIGGER_MASK
+        )
+
+    def pairs(self) -> List[Tuple[str, str]]:
+        """(mode, button or direction) pairs, in canonical order."""
+        pairs = [("press", b) for b in BUTTONS if self.press & BUTTON_BITS[b]]
+        pairs.append(TRIGGER_NAMES[self.trigger])
+        return pairs
+
+    def __str__(self) -> str:
+        return "_".join([SIDE_NAMES[self.side]] + [f"{m}_{n}" for m, n in self.pairs()])
+
+
+@lru_cache(maxsize=1024)
+def parse(hotkey: str) -> Optional[Hotkey]:
+    """Returns None if hotkey is invalid."""
+    if hotkey[:2] not in ("q_", "a_"):
+        return None
+    hotkeylist = hotkey[2:].split("_")
+    if len(hotkeylist) % 2 != 0:
+        return None
+    press = 0
+    for i in range(0, len(hotkeylist) - 2, 2):
+        if hotkeylist[i] != "press" or hotkeylist[i + 1] not in BUTTON_BITS:
+            return None
+        press |= BUTTON_BITS[hotkeylist[i + 1]]
+    trigger = TRIGGERS.get((hotkeylist[-2], hotkeylist[-1]))
+    if trigger is None:
+        return None
+    # Gesture is drawn while holding a button
+    if trigger >= TRIGGER_GESTURE_UP and not press:
+        return None
+    return Hotkey(SIDE_NAMES.index(hotkey[0]), press, trigger)
+
+
+@lru_cache(maxsize=1024)
+def parse_sequence(hotkey: str) -> Optional[Tuple[Hotkey, ...]]:
+    """Parses each step of a sequence hotkey. Returns None if invalid."""
+    steps = hotkey.split(SEQUENCE_SEP)
+    if len(steps) < 2:
+        return None
+    parsed = []
+    for i, step in enumerate(steps):
+        step_hotkey = parse(step if i == 0 else f"{hotkey[0]}_{step}")
+        if step_hotkey is None:
+            return None
+        parsed.append(step_hotkey)
+    return tuple(parsed)
+
+
+def is_valid(hotkey: str) -> bool:
+    """Returns True if hotkey or sequence hotkey is valid."""
+    if SEQUENCE_SEP in hotkey:
+        return parse_sequence(hotkey) is not None
+    return parse(hotkey) is not None
+
+
+def canonical(hotkey: str) -> Optional[str]:
+    """Returns hotkey with presses in BUTTONS order. None if invalid."""
+    if SEQUENCE_SEP in hotkey:
+        steps = parse_sequence(hotkey)
+        if steps is None:
+            return None
+        return SEQUENCE_SEP.join([str(steps[0])] + [str(s)[2:] for s in steps[1:]])
+    parsed = parse(hotkey)
+    return str(parsed) if parsed is not None else None
+
+
+def encode(hotkey: str) -> Optional[int]:
+    """Returns int key of hotkey. None if invalid."""
+    parsed = parse(hotkey)
+    return parsed.key if parsed is not None else None
+
+
+def encode_sequence(hotkey: str) -> Optional[Tuple[int, ...]]:
+    """Returns int key of each step of sequence hotkey. None if invalid."""
+    steps = parse_sequence(hotkey)
+    return tuple(s.key for s in steps) if steps is not None else None
+
+
+def decode(key: int) -> str:
+    """Builds canonical hotkey string from int key. Inverse of `encode`."""
+    return str(Hotkey.from_key(key))
@@ -1,14 +1,34 @@
-from typing import TYPE_CHECKING
+from typing import Any, Callable, Dict, List, Tuple
+
 from .v1 import v1_compat
 
-if TYPE_CHECKING:
-    from ..firstrun import Version
+# Version of config that has no version stored, and no settings from older versions
+UNKNOWN_VERSION = (-1, -1)
+
+# Takes config and returns new config, and html notice for the user or "".
+Migration = Callable[[Dict[str, Any]], Tuple[Dict[str, Any], str]]
+
+# Migrations are run in order,
+# if config was last saved by an add-on version older than (major, minor).
+MIGRATIONS: List[Tuple[Tuple[int, int], Migration]] = [
+    ((2, 0), v1_compat),
+]
+
 
+def migrate(
+    config: Dict[str, Any], prev_version: Tuple[int, int]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Returns config migrated from `prev_version`, and notices for the user.
 
-def compat(prev_version: "Version") -> None:
-    """Executes code for compatability from older versions."""
-    if prev_version == "-1.-1":
-        return
-    elif prev_version < "2.0":
-        print("Review Hotmouse: Running v1_compat()")
-        v1_compat()
+    Migrations don't write config, so it can be written once afterwards.
+    """
+    notices: List[str] = []
+    if prev_version == UNKNOWN_VERSION:
+        return (config, notices)
+    for version, migration in MIGRATIONS:
+        if prev_version < version:
+            print(f"Review Hotmouse: Running {migration.__name__}()")
+            config, notice = migration(config)
+            if notice:
+                notices.append(notice)
+    return (config, notices)
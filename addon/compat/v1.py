@@ -1,43 +1,48 @@
-from typing import Dict, Tuple
+from typing import Any, Dict, Tuple
+import copy
 
-from aqt import mw
-from aqt.utils import showText
+from .. import codec
+from ..core import ACTION_NAMES
 
-from ..event import Button, ACTION_OPTS
 
+def v1_compat(config: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """Compat code from v1. Returns new config, and notice if hotkeys are modified.
 
-def v1_compat() -> None:
-    """Compat code from v1.
-
+    Move shortcuts to config["shortcuts"]
     Change hotkeys ending in 'press' to 'click'
     Change action "" to <none>
     Remove shortcuts using xbutton 2-9
     Remove shortcuts with invalid hotkey or action strings
-    Inform user if their hotkeys are modified.
     """
-    shortcuts = get_and_remove_v1_shortcuts_from_config()
+    config = copy.deepcopy(config)
+    shortcuts = pop_v1_shortcuts(config)
     modify_empty_action_shortcuts(shortcuts)
     (modified, removed) = modify_hotkeys_ending_with_press(shortcuts)
     removed2 = remove_invalid_shortcuts(shortcuts)
     removed.update(removed2)
-    config = mw.addonManager.getConfig(__name__)
     config["shortcuts"] = shortcuts
-    mw.addonManager.writeConfig(__name__, config)
+    notice = ""
     if modified or removed:
-        inform_v1_shortcuts_modified(modified, removed)
+        notice = v1_shortcuts_modified_notice(modified, removed)
+    return (config, notice)
 
 
-def get_and_remove_v1_shortcuts_from_config() -> Dict[str, str]:
-    """Remove and returns shortcut config entries. Including config["shortcuts"]"""
-    config = mw.addonManager.getConfig(__name__)
+def pop_v1_shortcuts(config: Dict[str, Any]) -> Dict[str, str]:
+    """Removes and returns shortcut config entries. Including config["shortcuts"]"""
     shortcuts = {}
     config_keys = [
         "threshold_wheel_ms",
+        "wheel_scroll_edge",
         "threshold_angle",
         "tooltip",
         "z_debug",
+        "z_latency",
+        "event_filter_mode",
         "version",
         "shortcuts",
+        "profiles",
+        "default_enabled",
+        "macros",
     ]
 
     for key in config:
@@ -47,10 +52,9 @@ def get_and_remove_v1_shortcuts_from_config() -> Dict[str, str]:
     for key in shortcuts:
         config.pop(key)
     if "shortcuts" in config:
-        existing_shortcuts = config["shortcuts"]
+        existing_shortcuts = config.pop("shortcuts")
         for hotkey in existing_shortcuts:
             shortcuts[hotkey] = existing_shortcuts[hotkey]
-    mw.addonManager.writeConfig(__name__, config)
     return shortcuts
 
 
@@ -95,30 +99,12 @@ def modify_hotkeys_ending_with_press(
 
 def is_valid_hotkey(hotkey: str) -> bool:
     """Returns True if hotkey string is valid."""
-    mode_opts = ["press", "click", "wheel"]
-    btn_opts = [b.name for b in Button]
-    wheel_opts = ["up", "down"]
-
-    hotkeylist = hotkey[2:].split("_")
-    if len(hotkeylist) == 0 or len(hotkeylist) % 2 != 0:
-        return False
-    for i in range(0, len(hotkeylist), 2):
-        mode = hotkeylist[i]
-        btn = hotkeylist[i + 1]
-        if mode not in mode_opts:
-            return False
-        if mode == "wheel" and btn not in wheel_opts:
-            return False
-        elif mode in ("press", "click") and btn not in btn_opts:
-            return False
-    if hotkey[-2] == "press":
-        return False
-    return True
+    return codec.is_valid(hotkey)
 
 
 def is_valid_action(action: str) -> bool:
     """Returns True if action string is valid."""
-    if action not in ACTION_OPTS:
+    if action not in ACTION_NAMES:
         return False
     return True
 
@@ -136,8 +122,8 @@ def remove_invalid_shortcuts(shortcuts: Dict[str, str]) -> Dict[str, str]:
     return remove
 
 
-def inform_v1_shortcuts_modified(mod: Dict[str, str], rem: Dict[str, str]) -> None:
-    """Notifies user about how shortcuts were changed.
+def v1_shortcuts_modified_notice(mod: Dict[str, str], rem: Dict[str, str]) -> str:
+    """Returns html notice about how shortcuts were changed.
 
     - mod: {original_hotkey: new_hotkey}
     - rem: {hotkey: action}
@@ -170,5 +156,4 @@ def inform_v1_shortcuts_modified(mod: Dict[str, str], rem: Dict[str, str]) -> No
         for hotkey in rem:
             rem_msg += "<br>"
             rem_msg += f"{hotkey}: {rem[hotkey]}"
-    msg = base.format(mod=mod_msg, rem=rem_msg)
-    showText(msg, mw, type="html", title="Review Hotmouse", copyBtn=True)
+    return base.format(mod=mod_msg, rem=rem_msg)
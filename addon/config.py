@@ -1,9 +1,23 @@
-from typing import NamedTuple, Optional, List, Dict, Tuple, Union, Literal
+from typing import (
+    Any,
+    Callable,
+    NamedTuple,
+    Optional,
+    List,
+    Dict,
+    FrozenSet,
+    Union,
+    Literal,
+)
 
 from aqt.qt import *
+from aqt.utils import showText
 
 from .ankiaddonconfig import *
-from .event import ACTION_OPTS, Button, refresh_config
+from . import codec
+from .codec import SEQUENCE_SEP
+from .core import click_waits, compile_macros
+from .event import ACTION_OPTS, latency, refresh_config
 
 
 def general_tab(conf_window: ConfigWindow) -> None:
@@ -11,9 +25,14 @@ def general_tab(conf_window: ConfigWindow) -> None:
     tab.number_input(
         "threshold_wheel_ms",
         "Mouse scroll threshold (1000 is 1s)",
-        tooltip="How long a delay between subsequent scroll actions?",
+        tooltip="Scrolls less than this apart are treated as a single scroll action.",
         maximum=3000,
     )
+    tab.checkbox(
+        "wheel_scroll_edge",
+        "Scroll long cards before triggering wheel hotkeys",
+        "Wheel hotkeys are only triggered when scrolling past the top or bottom of the card",
+    )
     tab.checkbox(
         "default_enabled",
         "add-on is enabled at start",
@@ -21,28 +40,52 @@ def general_tab(conf_window: ConfigWindow) -> None:
     )
     tab.checkbox("tooltip", "When triggered, show action name")
     tab.checkbox("z_debug", "Debugging: Show hotkey on mouse action")
+    latency_layout = tab.hlayout()
+    latency_layout.checkbox("z_latency", "Debugging: Record latency of actions")
+    latency_btn = QPushButton("Show Latency")
+    latency_btn.clicked.connect(lambda _: show_latency(conf_window))
+    latency_layout.addWidget(latency_btn)
+    latency_layout.stretch()
     tab.stretch()
 
 
+def show_latency(parent: QWidget) -> None:
+    showText(
+        latency.report_html(),
+        parent,
+        type="html",
+        title="Review Hotmouse Latency",
+        copyBtn=True,
+    )
+
+
 class Options(NamedTuple):
     mode: List[str]
     button: List[str]
     wheel: List[str]
+    gesture: List[str]
     action: List[str]
 
 
 OPTS = Options(
-    mode=["press", "click", "wheel"],
-    button=[b.name for b in Button],
+    mode=codec.MODES,
+    button=codec.BUTTONS,
     wheel=["up", "down"],
+    gesture=codec.GESTURE_DIRS,
     action=ACTION_OPTS,
 )
 
 
+# Gesture is the last mode, so indexes are the same as in OPTS.mode
+FIRST_MODES = [mode for mode in OPTS.mode if mode != "gesture"]
+
+
 class DDConfigLayout(ConfigLayout):
     def __init__(self, conf_window: ConfigWindow):
         super().__init__(conf_window, QBoxLayout.Direction.LeftToRight)
         self.dropdowns: List[QComboBox] = []
+        # Called when any dropdown changes
+        self.on_change: Optional[Callable[[], None]] = None
 
     def create_dropdown(
         self, current: str, options: List[str], is_mode: bool = False
@@ -57,8 +100,13 @@ class DDConfigLayout(ConfigLayout):
             dropdown.currentIndexChanged.connect(
                 lambda optidx, d=ddidx: self.on_mode_change(optidx, d)
             )
+        dropdown.currentIndexChanged.connect(lambda _: self.changed())
         return dropdown
 
+    def changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
+
     def on_mode_change(self, optidx: int, ddidx: int) -> None:
         """Handler for when mode dropdown changes"""
         mode = OPTS.mode[optidx]
@@ -76,162 +124,353 @@ class DDConfigLayout(ConfigLayout):
                 dd = dropdowns.pop()
                 self.removeWidget(dd)
                 dd.deleteLater()
-            if mode == "click":
+            if mode in ("click", "doubleclick", "tripleclick"):
                 self.create_dropdown(OPTS.button[0], OPTS.button)
-            else:  # mode == "wheel"
+            elif mode == "wheel":
                 self.create_dropdown(OPTS.wheel[0], OPTS.wheel)
+            else:  # mode == "gesture"
+                self.create_dropdown(OPTS.gesture[0], OPTS.gesture)
+
+
+def hotkey_text(hotkey: str) -> str:
+    """eg: `q_press_left_click_right` -> `press left  click right`
+
+    Invalid hotkey is returned as is.
+    """
+    if SEQUENCE_SEP in hotkey:
+        steps = codec.parse_sequence(hotkey)
+    else:
+        parsed = codec.parse(hotkey)
+        steps = (parsed,) if parsed is not None else None
+    if steps is None:
+        return hotkey
+    return "  →  ".join(
+        "  ".join(f"{mode} {name}" for mode, name in step.pairs()) for step in steps
+    )
+
+
+class HotkeyModel(QAbstractTableModel):
+    """Shortcuts of one side. Rows are plain data, view only renders visible rows."""
+
+    HOTKEY, ACTION, DELAY, DELETE = range(4)
+    HEADERS = ["Hotkey", "Action", "Delay", ""]
+
+    def __init__(self, side: str) -> None:
+        super().__init__()
+        self.side = side
+        # [hotkey, action], indexed by HOTKEY and ACTION
+        self.rows: List[List[str]] = []
+        # {hotkey: delay in ms added by multi-click}
+        self.waits: Dict[str, int] = {}
+        # Actions and macros
+        self.actions: FrozenSet[str] = frozenset(OPTS.action)
+
+    def load(self, shortcuts: Dict[str, str], actions: List[str] = OPTS.action) -> None:
+        """Invalid shortcuts are left out, so they are removed on save."""
+        self.beginResetModel()
+        self.actions = frozenset(actions)
+        self.rows = [
+            [hotkey, action]
+            for hotkey, action in shortcuts.items()
+            if hotkey[0] == self.side
+            and action in self.actions
+            and codec.is_valid(hotkey)
+        ]
+        self.waits = click_waits(
+            dict(self.rows), QApplication.doubleClickInterval(), self.actions
+        )
+        self.endResetModel()
+
+    def get_data(self, hotkeys_data: Dict[str, str]) -> None:
+        """Adds hotkey entries to hotkeys_data dictionary."""
+        for hotkey, action in self.rows:
+            hotkeys_data[hotkey] = action
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(
+        self,
+        section: int,
+        orientation: Qt.Orientation,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+        ):
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        flags = Qt.ItemFlag.ItemIsEnabled
+        column = index.column()
+        if column == self.ACTION or (
+            column == self.HOTKEY and SEQUENCE_SEP not in self.rows[index.row()][0]
+        ):
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        hotkey, action = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.HOTKEY:
+                return hotkey_text(hotkey)
+            if column == self.ACTION:
+                return action
+            if column == self.DELAY:
+                wait = self.waits.get(hotkey)
+                return f"+{wait}ms" if wait else ""
+            return "⌫"
+        if role == Qt.ItemDataRole.EditRole and column in (self.HOTKEY, self.ACTION):
+            return self.rows[index.row()][column]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            if column == self.HOTKEY and SEQUENCE_SEP in hotkey:
+                return "Sequence hotkeys can only be edited in the config json."
+            if column == self.DELAY and hotkey in self.waits:
+                return "Waits this long for a double or triple click before triggering."
+            if column == self.DELETE:
+                return "Delete this shortcut."
+        if role == Qt.ItemDataRole.ForegroundRole and column == self.DELETE:
+            return QColor("red")
+        return None
+
+    def setData(
+        self, index: QModelIndex, value: Any, role: int = Qt.ItemDataRole.EditRole
+    ) -> bool:
+        column = index.column()
+        if role != Qt.ItemDataRole.EditRole or column not in (self.HOTKEY, self.ACTION):
+            return False
+        row = self.rows[index.row()]
+        if row[column] == value:
+            return False
+        if column == self.HOTKEY and not codec.is_valid(value):
+            return False
+        row[column] = value
+        self.dataChanged.emit(index, index)
+        if column == self.HOTKEY:
+            self.update_waits()
+        return True
+
+    def update_waits(self) -> None:
+        waits = click_waits(
+            dict(self.rows), QApplication.doubleClickInterval(), self.actions
+        )
+        if waits != self.waits:
+            self.waits = waits
+            self.dataChanged.emit(
+                self.index(0, self.DELAY), self.index(len(self.rows) - 1, self.DELAY)
+            )
+
+    def add_row(self, hotkey: str, action: str) -> QModelIndex:
+        row = len(self.rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.rows.append([hotkey, action])
+        self.endInsertRows()
+        return self.index(row, self.HOTKEY)
+
+    def removeRows(
+        self, row: int, count: int, parent: QModelIndex = QModelIndex()
+    ) -> bool:
+        if parent.isValid() or row < 0 or row + count > len(self.rows):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del self.rows[row : row + count]
+        self.endRemoveRows()
+        self.update_waits()
+        return True
+
+
+class HotkeyEditor(QWidget):
+    def __init__(self, parent: QWidget, layout: DDConfigLayout) -> None:
+        super().__init__(parent)
+        self.dd_layout = layout
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        self.setAutoFillBackground(True)
+
+
+class HotkeyDelegate(QStyledItemDelegate):
+    """Edits hotkey with the mode and button dropdowns.
+
+    Each change is written to the model as it is made.
+    """
+
+    def __init__(self, conf_window: ConfigWindow, side: str, parent: QObject) -> None:
+        super().__init__(parent)
+        self.conf_window = conf_window
+        self.side = side
+
+    def createEditor(
+        self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex
+    ) -> QWidget:
+        layout = DDConfigLayout(self.conf_window)
+        hotkey = codec.parse(index.data(Qt.ItemDataRole.EditRole))
+        if hotkey is None:
+            hotkey = codec.parse(f"{self.side}_click_right")
+            assert hotkey is not None
+        for i, (mode, name) in enumerate(hotkey.pairs()):
+            # Gesture needs a press before it
+            modes = OPTS.mode if i else FIRST_MODES
+            layout.create_dropdown(mode, modes, is_mode=True)
+            if mode == "wheel":
+                layout.create_dropdown(name, OPTS.wheel)
+            elif mode == "gesture":
+                layout.create_dropdown(name, OPTS.gesture)
+            else:
+                layout.create_dropdown(name, OPTS.button)
+        layout.addStretch()
+        editor = HotkeyEditor(parent, layout)
+        layout.on_change = lambda: self.commitData.emit(editor)
+        return editor
+
+    def setEditorData(self, editor: QWidget, index: QModelIndex) -> None:
+        # Editor is built from the hotkey, and changes of model come from the editor.
+        pass
+
+    def setModelData(
+        self, editor: QWidget, model: QAbstractItemModel, index: QModelIndex
+    ) -> None:
+        assert isinstance(editor, HotkeyEditor)
+        hotkey_str = self.side
+        for dd in editor.dd_layout.dropdowns:
+            hotkey_str += "_" + dd.currentText()
+        model.setData(index, HotkeyTabManager.sort_hotkey_btn(hotkey_str))
+
+    def updateEditorGeometry(
+        self, editor: QWidget, option: QStyleOptionViewItem, index: QModelIndex
+    ) -> None:
+        editor.setGeometry(option.rect)
+
+
+class ActionDelegate(QStyledItemDelegate):
+    """Action dropdowns share `actions` model, instead of each copying all actions."""
+
+    def __init__(self, actions: QStringListModel, parent: QObject) -> None:
+        super().__init__(parent)
+        self.actions = actions
+
+    def createEditor(
+        self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex
+    ) -> QWidget:
+        dropdown = QComboBox(parent)
+        dropdown.setModel(self.actions)
+        dropdown.currentIndexChanged.connect(lambda _: self.commitData.emit(dropdown))
+        return dropdown
+
+    def setEditorData(self, editor: QWidget, index: QModelIndex) -> None:
+        assert isinstance(editor, QComboBox)
+        # Not a change to commit
+        editor.blockSignals(True)
+        editor.setCurrentIndex(editor.findText(index.data(Qt.ItemDataRole.EditRole)))
+        editor.blockSignals(False)
+
+    def setModelData(
+        self, editor: QWidget, model: QAbstractItemModel, index: QModelIndex
+    ) -> None:
+        assert isinstance(editor, QComboBox)
+        model.setData(index, editor.currentText())
 
 
 class HotkeyTabManager:
     def __init__(
-        self, tab: ConfigLayout, side: Union[Literal["q"], Literal["a"]]
+        self,
+        tab: ConfigLayout,
+        side: Union[Literal["q"], Literal["a"]],
+        actions: QStringListModel,
     ) -> None:
         self.tab = tab
         self.config_window = tab.config_window
         self.side = side
-        # For each row, (hotkey_layout, action_layout)
-        self.layouts: List[Tuple[DDConfigLayout, DDConfigLayout]] = []
-        self.setup_tab()
+        self.model = HotkeyModel(side)
+        self.actions = actions
+        self.setup_tab(actions)
 
-    def setup_tab(self) -> None:
+    def setup_tab(self, actions: QStringListModel) -> None:
         tab = self.tab
-        self.rows_layout = self.tab.vlayout()
+        view = QTableView()
+        view.setModel(self.model)
+        view.setItemDelegateForColumn(
+            HotkeyModel.HOTKEY, HotkeyDelegate(self.config_window, self.side, view)
+        )
+        view.setItemDelegateForColumn(HotkeyModel.ACTION, ActionDelegate(actions, view))
+        view.setEditTriggers(QAbstractItemView.EditTrigger.AllEditTriggers)
+        view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        view.setShowGrid(False)
+        # Fixed sizes, so rows outside of the view are never measured
+        vheader = view.verticalHeader()
+        vheader.hide()
+        vheader.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vheader.setDefaultSectionSize(32)
+        header = view.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        header.setSectionResizeMode(HotkeyModel.HOTKEY, QHeaderView.ResizeMode.Stretch)
+        header.resizeSection(HotkeyModel.ACTION, 160)
+        header.resizeSection(HotkeyModel.DELAY, 70)
+        header.resizeSection(HotkeyModel.DELETE, 30)
+        view.clicked.connect(self.on_clicked)
+        self.view = view
+        tab.addWidget(view)
+
         btn_layout = tab.hlayout()
         add_btn = QPushButton("+  Add New ")
-        add_btn.clicked.connect(
-            lambda _: self.add_row(f"{self.side}_click_right", "<none>")
-        )
+        add_btn.clicked.connect(lambda _: self.add_row())
         add_btn.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Fixed)
         add_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
         btn_layout.addWidget(add_btn)
         btn_layout.stretch()
         btn_layout.setContentsMargins(0, 20, 0, 5)
         tab.setSpacing(0)
-        tab.addLayout(btn_layout)
-        tab.stretch()
         tab.space(10)
         tab.text("If you set duplicate hotkeys, only the last one will be saved.")
+        tab.text("Gesture hotkeys need at least one 'press' button.")
+        tab.text("Sequence hotkeys and macros can only be added in the config json.")
+        tab.text(
+            "Clicks with a double or triple click hotkey wait for the next click,"
+            " shown as added delay."
+        )
 
-    def create_layout(self) -> DDConfigLayout:
-        return DDConfigLayout(self.config_window)
-
-    def clear_rows(self) -> None:
-        """Clear all rows in tab. Run before setup_rows."""
-        for i in range(self.rows_layout.count()):
-            widget = self.rows_layout.itemAt(0).widget()
-            self.rows_layout.removeWidget(widget)
-            widget.deleteLater()
-            self.layouts = []
-
-    def setup_rows(self) -> None:
-        hotkeys = conf.get("shortcuts")
-        for hotkey in hotkeys:
-            if hotkey[0] == self.side:
-                self.add_row(hotkey, hotkeys[hotkey])
-
-    def hotkey_layout(self, hotkey: str) -> Optional[DDConfigLayout]:
-        """hotkey eg: `q_press_left_click_right`. Returns None if hotkey is invalid."""
-        layout = self.create_layout()
-        hotkeylist = hotkey[2:].split("_")
-        if len(hotkeylist) % 2 != 0:
-            return None
-        for i in range(0, len(hotkeylist), 2):
-            mode = hotkeylist[i]
-            btn = hotkeylist[i + 1]
-            if mode not in OPTS.mode:
-                return None
-            if mode == "wheel" and btn not in OPTS.wheel:
-                return None
-            if mode in ("press", "click") and btn not in OPTS.button:
-                return None
-
-            layout.create_dropdown(mode, OPTS.mode, is_mode=True)
-            if mode == "wheel":
-                layout.create_dropdown(btn, OPTS.wheel)
-            else:
-                layout.create_dropdown(btn, OPTS.button)
-        return layout
-
-    def action_layout(self, action: str) -> Optional[DDConfigLayout]:
-        """Returns None if action string is invalid."""
-        if action not in OPTS.action:
-            return None
-        layout = self.create_layout()
-        layout.stretch()
-        layout.text("&nbsp;<b>→</b>&nbsp;", html=True)
-        act_opts = OPTS.action
-        layout.create_dropdown(action, act_opts)
-        return layout
-
-    def add_row(self, hotkey: str, action: str) -> None:
-        hlay = self.hotkey_layout(hotkey)
-        alay = self.action_layout(action)
-        if hlay and alay:
-            container = QWidget()
-            layout = self.create_layout()
-            layout.setContentsMargins(0, 4, 2, 4)  # decrease margin
-            container.setLayout(layout)
-            self.rows_layout.addWidget(container)
-            layout.addLayout(hlay)
-            layout.addLayout(alay)
-            layout_tuple = (hlay, alay)
-            self.layouts.append(layout_tuple)
-            label = QLabel(
-                "&nbsp;<a href='/' style='text-decoration:none; color: red;'>⌫</a>"
-            )
-            label.setTextFormat(Qt.TextFormat.RichText)
-            label.setToolTip("Delete this shortcut.")
-            layout.addWidget(label)
-
-            def remove(l: str, layouts: Tuple[DDConfigLayout, DDConfigLayout]) -> None:
-                self.rows_layout.removeWidget(container)
-                container.deleteLater()
-                self.layouts.remove(layouts)
+    def add_row(self) -> None:
+        index = self.model.add_row(f"{self.side}_click_right", "<none>")
+        self.view.scrollTo(index)
+        self.view.edit(index)
 
-            label.linkActivated.connect(lambda l, t=layout_tuple: remove(l, t))
+    def on_clicked(self, index: QModelIndex) -> None:
+        if index.column() == HotkeyModel.DELETE:
+            self.model.removeRows(index.row(), 1)
 
     def on_update(self) -> None:
-        self.clear_rows()
-        self.setup_rows()
+        self.model.load(conf.get("shortcuts"), self.actions.stringList())
 
     def get_data(self, hotkeys_data: Dict[str, str]) -> None:
         """Adds hotkey entries to hotkeys_data dictionary."""
-        for row in self.layouts:
-            hotkey_layout = row[0]
-            action_layout = row[1]
-            hotkey_str = self.side  # type: str
-            for dd in hotkey_layout.dropdowns:
-                hotkey_str += "_" + dd.currentText()
-            hotkey_str = self.sort_hotkey_btn(hotkey_str)
-            action_str = action_layout.dropdowns[0].currentText()
-            hotkeys_data[hotkey_str] = action_str
+        self.model.get_data(hotkeys_data)
 
     @staticmethod
     def sort_hotkey_btn(hotkey_str: str) -> str:
         """Sort button order for 'press' in hotkey_str."""
-        hotkeylist = hotkey_str.split("_")
-        if len(hotkeylist) - 1 <= 4:
-            # Doesn't have multiple 'press'
-            return hotkey_str
-        btns = []
-        btn_names = [b.name for b in Button]
-        for i in range(1, len(hotkeylist) - 2, 2):
-            btn = hotkeylist[i + 1]
-            btns.append(btn)
-        btns = sorted(btns, key=lambda x: btn_names.index(x))
-        new_hotkey_str = "{}_".format(hotkeylist[0])
-        for btn in btns:
-            new_hotkey_str += "press_"
-            new_hotkey_str += "{}_".format(btn)
-        new_hotkey_str += "{}_{}".format(hotkeylist[-2], hotkeylist[-1])
-        return new_hotkey_str
+        return codec.canonical(hotkey_str) or hotkey_str
 
 
 def hotkey_tabs(conf_window: ConfigWindow) -> None:
+    # Shared by all action dropdowns
+    actions = QStringListModel(OPTS.action)
+
+    def update_actions() -> None:
+        """Macros can be bound like actions."""
+        actions.setStringList(
+            OPTS.action + list(compile_macros(conf.get("macros") or {}))
+        )
+
+    conf_window.widget_updates.append(update_actions)
     q_tab = conf_window.add_tab("Question Hotkeys")
-    q_manager = HotkeyTabManager(q_tab, "q")
+    q_manager = HotkeyTabManager(q_tab, "q", actions)
     a_tab = conf_window.add_tab("Answer Hotkeys")
-    a_manager = HotkeyTabManager(a_tab, "a")
+    a_manager = HotkeyTabManager(a_tab, "a", actions)
     conf_window.widget_updates.append(q_manager.on_update)
     conf_window.widget_updates.append(a_manager.on_update)
 
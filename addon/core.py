@@ -0,0 +1,719 @@
+"""Hotkey dispatch without Qt or Anki.
+
+Mouse input is fed in as ints and floats, and resolved into action names.
+Adapters in `event` convert Qt and web events, and run the actions.
+"""
+
+from typing import (
+    AbstractSet,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from enum import Enum
+import math
+import time
+
+from . import codec
+from .codec import (
+    BUTTONS,
+    BUTTON_MASK,
+    KEY_SPACE,
+    SEQUENCE_SEP,
+    SIDE_SHIFT,
+    SIDE_X,
+    TRIGGER_BITS,
+    TRIGGER_DOUBLECLICK,
+    TRIGGER_GESTURE_UP,
+    TRIGGER_MASK,
+    TRIGGER_WHEEL_DOWN,
+    TRIGGER_WHEEL_UP,
+)
+
+# Order is the order of action dropdown in config window
+ACTION_NAMES = [
+    "<none>",
+    "on",
+    "off",
+    "on_off",
+    "undo",
+    "show_ans",
+    "again",
+    "hard",
+    "good",
+    "easy",
+    "delete",
+    "suspend_card",
+    "suspend_note",
+    "bury_card",
+    "bury_note",
+    "mark",
+    "red",
+    "orange",
+    "green",
+    "blue",
+    "audio",
+    "record_voice",
+    "replay_voice",
+    "replay_audio",
+    "toggle_auto_advance",
+    "copy",
+    "paste",
+]
+ACTION_SET = frozenset(ACTION_NAMES)
+
+
+class WheelDir(Enum):
+    DOWN = -1
+    UP = 1
+
+
+class WheelEngine:
+    """Turns a stream of wheel deltas into discrete scroll steps.
+
+    Deltas are in qt's angle delta unit, where 120 is a single mouse wheel notch.
+    Deltas are accumulated, and a step is triggered once per gesture,
+    when the accumulated delta reaches a notch.
+    A gesture ends when there is no wheel event for `threshold_ms`, or the direction changes.
+    """
+
+    NOTCH = 120
+    # Trackpads without angle delta, and web wheel events report pixels
+    PIXELS_PER_NOTCH = 50
+
+    def __init__(self, threshold_ms: int) -> None:
+        self.set_threshold(threshold_ms)
+        self.accumulated = 0
+        self.gesture_start = -math.inf
+        self.last_time = -math.inf
+        # Whether a step was triggered in this gesture
+        self.fired = False
+        # Whether the step's shortcut was executed, so rest of the gesture should be blocked
+        self.consumed = False
+
+    def set_threshold(self, threshold_ms: int) -> None:
+        self.threshold = threshold_ms / 1000
+
+    def feed(self, delta: int, now: float) -> Optional[WheelDir]:
+        """Returns scroll direction if this delta triggers a step.
+
+        `now` should be from a monotonic clock, in seconds.
+        """
+        if now - self.last_time > self.threshold or (delta ^ self.accumulated) < 0:
+            self.accumulated = 0
+            self.gesture_start = now
+            self.fired = False
+            self.consumed = False
+        self.last_time = now
+        self.accumulated += delta
+        if self.fired:
+            return None
+        if self.accumulated >= self.NOTCH:
+            self.fired = True
+            return WheelDir.UP
+        if self.accumulated <= -self.NOTCH:
+            self.fired = True
+            return WheelDir.DOWN
+        return None
+
+    def debug_state(self) -> str:
+        gesture_ms = (self.last_time - self.gesture_start) * 1000
+        return (
+            f"wheel: accumulated {self.accumulated}, gesture {gesture_ms:.0f}ms, "
+            f"fired {self.fired}, consumed {self.consumed}"
+        )
+
+
+# Source tags of wheel events, in priority order
+SOURCE_QT = 0
+SOURCE_WEB = 1
+SOURCE_NAMES = ["qt", "web"]
+
+
+class WheelSources:
+    """Drops wheel events that were already received from another source.
+
+    Qt event filter sees a wheel event before the web view. If the event isn't stopped,
+    detect_wheel.js sees the same scroll and sends it again. An event is dropped
+    if a higher priority source delivered an event within `WINDOW` seconds,
+    so the web view is only used when Qt doesn't receive wheel events.
+    """
+
+    WINDOW = 0.5
+
+    def __init__(self) -> None:
+        self.last_time = [-math.inf] * len(SOURCE_NAMES)
+        self.received = [0] * len(SOURCE_NAMES)
+        self.dropped = [0] * len(SOURCE_NAMES)
+
+    def accept(self, source: int, now: float) -> bool:
+        """Returns False if event is a duplicate. `now` is from a monotonic clock."""
+        self.received[source] += 1
+        self.last_time[source] = now
+        for other in range(source):
+            if now - self.last_time[other] < self.WINDOW:
+                self.dropped[source] += 1
+                return False
+        return True
+
+    def stats(self) -> str:
+        received = ", ".join(
+            f"{count} {name}" for name, count in zip(SOURCE_NAMES, self.received)
+        )
+        return f"wheel events: {received}, {sum(self.dropped)} duplicates dropped"
+
+
+class StrokeRecognizer:
+    """Recognizes a straight mouse stroke from mouse move positions.
+
+    Only the start position is kept, so each move is O(1).
+    A stroke is recognized once, when the cursor moved `DISTANCE` pixels away from
+    the start mostly along one axis. Diagonal strokes are ignored.
+    """
+
+    DISTANCE = 60
+
+    def __init__(self) -> None:
+        self.active = False
+        self.fired = False
+        self.x = 0.0
+        self.y = 0.0
+
+    def start(self, x: float, y: float) -> None:
+        self.active = True
+        self.fired = False
+        self.x = x
+        self.y = y
+
+    def stop(self) -> None:
+        self.active = False
+
+    def feed(self, x: float, y: float) -> Optional[int]:
+        """Returns index of direction in GESTURE_DIRS if stroke is recognized."""
+        if self.fired:
+            return None
+        dx = x - self.x
+        dy = y - self.y
+        adx = abs(dx)
+        ady = abs(dy)
+        if adx < self.DISTANCE and ady < self.DISTANCE:
+            return None
+        self.fired = True
+        if adx >= 2 * ady:
+            return 3 if dx > 0 else 2
+        if ady >= 2 * adx:
+            return 1 if dy > 0 else 0
+        return None
+
+
+class ClickCounter:
+    """Counts consecutive clicks of the same hotkey, each within `interval` seconds."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.key: Optional[int] = None
+        self.count = 0
+        self.last_time = 0.0
+
+    def is_next(self, key: int, now: float) -> bool:
+        """Returns True if clicking `key` at `now` continues the current clicks."""
+        return key == self.key and now - self.last_time <= self.interval
+
+    def feed(self, key: int, now: float) -> int:
+        """Returns number of consecutive clicks including this one."""
+        if self.is_next(key, now):
+            self.count += 1
+        else:
+            self.key = key
+            self.count = 1
+        self.last_time = now
+        return self.count
+
+    def reset(self) -> None:
+        self.key = None
+        self.count = 0
+
+
+WHEEL_TRIGGERS = {WheelDir.UP: TRIGGER_WHEEL_UP, WheelDir.DOWN: TRIGGER_WHEEL_DOWN}
+
+
+def compile_macros(macros: Mapping[str, Sequence[str]]) -> Dict[str, Tuple[str, ...]]:
+    """Returns {name: steps} of valid macros.
+
+    Steps must be actions other than macros, and a macro can't be named as an action.
+    """
+    return {
+        name: tuple(steps)
+        for name, steps in macros.items()
+        if name not in ACTION_SET
+        and isinstance(steps, list)
+        and steps
+        and all(step in ACTION_SET for step in steps)
+    }
+
+
+def compile_shortcuts(
+    shortcuts: Mapping[str, str], actions: AbstractSet[str] = ACTION_SET
+) -> Dict[int, str]:
+    """Returns {hotkey key: action}. Invalid hotkeys and actions not in `actions` are skipped."""
+    table = {}
+    for hotkey, action in shortcuts.items():
+        key = codec.encode(hotkey)
+        if key is not None and action in actions:
+            table[key] = action
+    return table
+
+
+def compile_sequences(
+    shortcuts: Mapping[str, str], actions: AbstractSet[str] = ACTION_SET
+) -> Dict[Tuple[int, ...], str]:
+    """Returns {step keys: action} of sequence hotkeys."""
+    table = {}
+    for hotkey, action in shortcuts.items():
+        if SEQUENCE_SEP not in hotkey or action not in actions:
+            continue
+        keys = codec.encode_sequence(hotkey)
+        if keys is not None:
+            table[keys] = action
+    return table
+
+
+def multi_click_counts(table: Mapping[int, str]) -> Dict[int, int]:
+    """Returns {click key: most clicks} for clicks that have a multi-click hotkey.
+
+    Only these clicks need to wait for the following clicks.
+    """
+    counts: Dict[int, int] = {}
+    for key in table:
+        trigger = key & TRIGGER_MASK
+        if TRIGGER_DOUBLECLICK <= trigger < TRIGGER_WHEEL_UP:
+            count = trigger // len(BUTTONS) + 1
+            click_key = key - (count - 1) * len(BUTTONS)
+            counts[click_key] = max(counts.get(click_key, 1), count)
+    return counts
+
+
+def click_waits(
+    shortcuts: Mapping[str, str],
+    interval_ms: int,
+    actions: AbstractSet[str] = ACTION_SET,
+) -> Dict[str, int]:
+    """Returns {hotkey: added latency in ms} of click hotkeys delayed by multi-click."""
+    counts = multi_click_counts(compile_shortcuts(shortcuts, actions))
+    waits = {}
+    for hotkey in shortcuts:
+        key = codec.encode(hotkey)
+        if key is None or (key & TRIGGER_MASK) >= TRIGGER_WHEEL_UP:
+            continue
+        count = (key & TRIGGER_MASK) // len(BUTTONS) + 1
+        if counts.get(key - (count - 1) * len(BUTTONS), 1) > count:
+            waits[hotkey] = interval_ms
+    return waits
+
+
+class SequenceMatcher:
+    """Matches sequence hotkeys with an automaton compiled from their steps.
+
+    States are nodes of a trie of steps, 0 being the start.
+    Each key fed is a single dict lookup. A partial sequence is dropped if the next step
+    doesn't follow within `TIMEOUT` seconds. If a sequence is the start of another,
+    the shorter one is matched.
+    """
+
+    TIMEOUT = 0.5
+
+    def __init__(self) -> None:
+        # {state * KEY_SPACE + key: next state}
+        self.transitions: Dict[int, int] = {}
+        # {final state: action}
+        self.actions: Dict[int, str] = {}
+        self.state = 0
+        self.last_time = 0.0
+
+    def compile(self, sequences: Mapping[Tuple[int, ...], str]) -> None:
+        self.transitions = {}
+        self.actions = {}
+        self.state = 0
+        for keys, action in sequences.items():
+            state = 0
+            for key in keys:
+                transition = state * KEY_SPACE + key
+                if transition not in self.transitions:
+                    self.transitions[transition] = len(self.transitions) + 1
+                state = self.transitions[transition]
+            self.actions[state] = action
+
+    def next_keys(self) -> List[int]:
+        """Returns keys that continue the current state. Empty if no sequence is started."""
+        if not self.state:
+            return []
+        start = self.state * KEY_SPACE
+        return [t - start for t in self.transitions if start <= t < start + KEY_SPACE]
+
+    def feed(self, key: int, now: float) -> Optional[str]:
+        """Returns action if `key` completes a sequence.
+
+        `state` is non-zero afterwards if `key` is a step of an unfinished sequence.
+        """
+        state = self.state
+        if state and now - self.last_time > self.TIMEOUT:
+            state = 0
+        next_state = self.transitions.get(state * KEY_SPACE + key)
+        if next_state is None and state:
+            # Key may start a new sequence
+            next_state = self.transitions.get(key)
+        if next_state is None:
+            self.state = 0
+            return None
+        self.last_time = now
+        action = self.actions.get(next_state)
+        self.state = 0 if action is not None else next_state
+        return action
+
+
+# Name of the profile made of the top-level shortcuts config
+DEFAULT_PROFILE = ""
+
+
+class ShortcutTable:
+    """Lookup tables compiled from a shortcuts config."""
+
+    def __init__(
+        self, shortcuts: Mapping[str, str], actions: AbstractSet[str] = ACTION_SET
+    ) -> None:
+        self.shortcuts = compile_shortcuts(shortcuts, actions)
+        sequences = compile_sequences(shortcuts, actions)
+        self.sequence = SequenceMatcher()
+        self.sequence.compile(sequences)
+        # Single-step shortcuts, and steps of sequences with the sequence's action
+        self.used_keys = dict(self.shortcuts)
+        # Single-step shortcuts, and first steps of sequences
+        self.first_keys = dict(self.shortcuts)
+        for keys, action in sequences.items():
+            self.first_keys.setdefault(keys[0], action)
+            for key in keys:
+                self.used_keys.setdefault(key, action)
+        # Whether any of the hotkeys use the wheel
+        self.has_wheel_hotkey = False
+        # `side key | held buttons << TRIGGER_BITS` of gesture hotkeys
+        self.gesture_holds: Set[int] = set()
+        for key in self.used_keys:
+            trigger = key & TRIGGER_MASK
+            if trigger in (TRIGGER_WHEEL_UP, TRIGGER_WHEEL_DOWN):
+                self.has_wheel_hotkey = True
+            elif trigger >= TRIGGER_GESTURE_UP:
+                self.gesture_holds.add(key & ~TRIGGER_MASK)
+        # {click key: most clicks} of clicks that wait for multi-click
+        self.multi_clicks = multi_click_counts(self.used_keys)
+
+
+class ProfileMap:
+    """Finds the shortcut profile of a card from its deck and note type.
+
+    A deck's profile also applies to its subdecks, and takes precedence over
+    the note type's profile. Results are cached by deck id and note type id,
+    so names are only looked up for the first card of each deck.
+    """
+
+    def __init__(self, decks: Mapping[str, str], note_types: Mapping[str, str]) -> None:
+        # {deck name: profile}
+        self.decks = decks
+        # {note type name: profile}
+        self.note_types = note_types
+        self.by_deck: Dict[int, str] = {}
+        self.by_note_type: Dict[int, str] = {}
+
+    def deck_profile(self, deck_name: str) -> str:
+        """Profile of the deck or its closest parent deck."""
+        parts = deck_name.split("::")
+        for i in range(len(parts), 0, -1):
+            profile = self.decks.get("::".join(parts[:i]))
+            if profile is not None:
+                return profile
+        return DEFAULT_PROFILE
+
+    def lookup(
+        self,
+        did: int,
+        mid: int,
+        deck_name: Callable[[int], str],
+        note_type_name: Callable[[int], str],
+    ) -> str:
+        profile = self.by_deck.get(did)
+        if profile is None:
+            profile = self.by_deck[did] = self.deck_profile(deck_name(did))
+        if profile == DEFAULT_PROFILE and self.note_types:
+            profile = self.by_note_type.get(mid)
+            if profile is None:
+                profile = self.by_note_type[mid] = self.note_types.get(
+                    note_type_name(mid), DEFAULT_PROFILE
+                )
+        return profile
+
+
+class Dispatcher:
+    """Resolves mouse input into actions.
+
+    Subclasses run the actions in `run_action`.
+    Multi-click waits until `flush_clicks` is called, which subclasses should do
+    after `click_interval_ms` from `start_click_timer`.
+    Lookup tables of the active profile are copied to attributes by `select`,
+    so switching profiles doesn't slow down dispatch.
+    """
+
+    # {profile: compiled table}
+    tables: Dict[str, ShortcutTable]
+    table: ShortcutTable
+    has_wheel_hotkey: bool
+    shortcuts: Dict[int, str]
+    sequence: SequenceMatcher
+    used_keys: Dict[int, str]
+    gesture_holds: Set[int]
+    multi_clicks: Dict[int, int]
+
+    def __init__(self, enabled: bool, click_interval_ms: int) -> None:
+        self.enabled = enabled
+        # Calls `show_debug` on every hotkey
+        self.debug = False
+        self.side = SIDE_X
+        self.wheel = WheelEngine(350)
+        self.wheel_sources = WheelSources()
+        self.stroke = StrokeRecognizer()
+        # Click hotkey that fires on release, if no gesture was drawn
+        self.pending_click: Optional[int] = None
+        # Bitmask of buttons whose press was stopped, or held during a stopped event
+        self.stopped_btns = 0
+        self.click_interval_ms = click_interval_ms
+        self.clicks = ClickCounter(click_interval_ms / 1000)
+        self.load({}, 350)
+
+    def load(
+        self,
+        shortcuts: Mapping[str, str],
+        threshold_wheel_ms: int,
+        profiles: Mapping[str, Mapping[str, str]] = {},
+        macros: Iterable[str] = (),
+    ) -> None:
+        """Compiles shortcuts config and each profile's shortcuts into lookup tables.
+
+        Shortcuts can use the actions and the names of `macros`.
+        Selects the default profile.
+        """
+        actions = ACTION_SET.union(macros)
+        self.tables = {
+            name: ShortcutTable(profile_shortcuts, actions)
+            for name, profile_shortcuts in profiles.items()
+        }
+        self.tables[DEFAULT_PROFILE] = ShortcutTable(shortcuts, actions)
+        self.wheel.set_threshold(threshold_wheel_ms)
+        self.use_table(self.tables[DEFAULT_PROFILE])
+
+    def select(self, profile: str) -> bool:
+        """Switches to the profile's table. Unknown profile selects the default profile.
+
+        Returns True if the table changed.
+        """
+        table = self.tables.get(profile) or self.tables[DEFAULT_PROFILE]
+        if table is self.table:
+            return False
+        self.use_table(table)
+        return True
+
+    def use_table(self, table: ShortcutTable) -> None:
+        self.table = table
+        self.shortcuts = table.shortcuts
+        self.sequence = table.sequence
+        self.used_keys = table.used_keys
+        self.has_wheel_hotkey = table.has_wheel_hotkey
+        self.gesture_holds = table.gesture_holds
+        self.multi_clicks = table.multi_clicks
+        # Partial hotkeys belong to the previous table
+        self.sequence.state = 0
+        self.clicks.reset()
+        self.stroke.stop()
+        self.pending_click = None
+
+    def wheel_bindings(self) -> Dict[str, List[int]]:
+        """Returns {side: bindings} of wheel hotkeys.
+
+        Bindings are `pressed buttons bitmask * 2 + (1 if up else 0)`.
+        If disabled, only shortcuts that turns on the add-on are included.
+        Later steps of sequences are in `pending_wheel_bindings` instead,
+        so they don't block scrolling when no sequence is started.
+        """
+        return self.bind_wheel(self.table.first_keys)
+
+    def pending_wheel_bindings(self) -> Dict[str, List[int]]:
+        """Returns {side: bindings} of wheel steps that continue the started sequence."""
+        return self.bind_wheel({key: "" for key in self.sequence.next_keys()})
+
+    def bind_wheel(self, keys: Mapping[int, str]) -> Dict[str, List[int]]:
+        bindings: Dict[str, List[int]] = {"q": [], "a": []}
+        for key, action in keys.items():
+            trigger = key & TRIGGER_MASK
+            if trigger not in (TRIGGER_WHEEL_UP, TRIGGER_WHEEL_DOWN):
+                continue
+            if not self.enabled and action not in ("on", "on_off"):
+                continue
+            side = "q" if key >> SIDE_SHIFT == 0 else "a"
+            btns = (key >> TRIGGER_BITS) & BUTTON_MASK
+            bindings[side].append(btns * 2 + (trigger == TRIGGER_WHEEL_UP))
+        return bindings
+
+    def stopped_btn(self, btn: int) -> bool:
+        """Returns True if the last press of any of `btn` flags was part of a hotkey.
+
+        Its release and context menu should be stopped too,
+        even if the side changed since the press.
+        """
+        return bool(self.stopped_btns & btn)
+
+    def record_stop(self, btns: int, stopped: bool) -> bool:
+        if stopped:
+            self.stopped_btns |= btns
+        return stopped
+
+    def run_action(self, key: int, action: str) -> None:
+        pass
+
+    def show_debug(self, key: int, action_str: str) -> None:
+        pass
+
+    def start_click_timer(self) -> None:
+        pass
+
+    def sequence_changed(self) -> None:
+        """Called when a sequence is started, continued or ended."""
+        pass
+
+    def stop_click_timer(self) -> None:
+        pass
+
+    def execute_shortcut(self, key: int) -> bool:
+        """Returns True if shortcut exists and is executed, or key is a sequence step."""
+        action_str = self.shortcuts.get(key, "")
+        next_step = False
+        if self.sequence.actions and self.enabled:
+            state = self.sequence.state
+            # Completed sequence takes precedence over single-step shortcut
+            action_str = self.sequence.feed(key, time.monotonic()) or action_str
+            next_step = not action_str and self.sequence.state != 0
+            if self.sequence.state != state or next_step:
+                self.sequence_changed()
+        if self.enabled and self.debug:
+            self.show_debug(key, "then…" if next_step else action_str)
+        if next_step:
+            return True
+
+        if not self.enabled and action_str not in ("on", "on_off"):
+            return False
+        if not action_str:
+            return False
+        self.run_action(key, action_str)
+        return True
+
+    def on_press(self, pressed: int, btns: int, x: float, y: float) -> bool:
+        """Returns True if shortcut is executed, or the press is part of a hotkey.
+
+        `pressed` is the pressed button's bit, `btns` are other buttons held down.
+        """
+        self.stopped_btns &= ~pressed
+        return self.record_stop(pressed | btns, self.handle_press(pressed, btns, x, y))
+
+    def handle_press(self, pressed: int, btns: int, x: float, y: float) -> bool:
+        key = self.side | btns << TRIGGER_BITS | pressed.bit_length() - 1
+        if self.gesture_holds:
+            self.stroke.stop()
+            self.pending_click = None
+            if self.side | (btns | pressed) << TRIGGER_BITS in self.gesture_holds:
+                self.stroke.start(x, y)
+                # Click hotkey waits for release, in case a gesture is drawn.
+                # Other presses pass through, so the web view still gets them.
+                if key in self.used_keys or key in self.multi_clicks:
+                    self.pending_click = key
+                    return self.enabled and key in self.used_keys
+        return self.handle_click(key)
+
+    def handle_click(self, key: int) -> bool:
+        """Returns True if shortcut is executed, or the click waits for the next click.
+
+        Only clicks that have a multi-click hotkey wait, so others are not delayed.
+        """
+        if self.clicks.key is None and key not in self.multi_clicks:
+            return self.execute_shortcut(key)
+        now = time.monotonic()
+        if self.clicks.key is not None and not self.clicks.is_next(key, now):
+            self.flush_clicks()
+        most_clicks = self.multi_clicks.get(key)
+        if most_clicks is None:
+            return self.execute_shortcut(key)
+        count = self.clicks.feed(key, now)
+        if count < most_clicks:
+            self.start_click_timer()
+            # Clicks so far pass through unless flushing them triggers a hotkey
+            return self.enabled and self.bound_clicks(key, count) > 0
+        self.stop_click_timer()
+        self.clicks.reset()
+        return self.execute_shortcut(key + (count - 1) * len(BUTTONS))
+
+    def flush_clicks(self) -> bool:
+        """Executes the multi-click hotkey of clicks so far. Called when no more clicks follow.
+
+        Falls back to the bound hotkey with the most clicks below the count.
+        """
+        self.stop_click_timer()
+        key = self.clicks.key
+        count = self.clicks.count
+        self.clicks.reset()
+        if key is None:
+            return False
+        count = self.bound_clicks(key, count)
+        if not count:
+            return False
+        return self.execute_shortcut(key + (count - 1) * len(BUTTONS))
+
+    def bound_clicks(self, key: int, count: int) -> int:
+        """Returns the most clicks up to `count` that has a hotkey, or 0 if none has."""
+        while count and key + (count - 1) * len(BUTTONS) not in self.used_keys:
+            count -= 1
+        return count
+
+    def on_move(self, btns: int, x: float, y: float) -> bool:
+        """Returns True if gesture shortcut is executed"""
+        if not self.stroke.active:
+            return False
+        direction = self.stroke.feed(x, y)
+        if direction is None:
+            return False
+        self.pending_click = None
+        key = self.side | btns << TRIGGER_BITS | TRIGGER_GESTURE_UP + direction
+        return self.record_stop(btns, self.execute_shortcut(key))
+
+    def on_release(self) -> bool:
+        """Ends gesture. Returns True if click shortcut waiting for release is executed"""
+        self.stroke.stop()
+        key = self.pending_click
+        self.pending_click = None
+        if key is None:
+            return False
+        return self.handle_click(key)
+
+    def handle_scroll(self, delta: int, btns: int, now: float) -> bool:
+        """Returns True if shortcut is executed, or the scroll is part of an executed one.
+
+        `delta` is in qt angle delta unit. Positive delta is scrolling up.
+        Event should be accepted by `wheel_sources` first.
+        """
+        wheel_dir = self.wheel.feed(delta, now)
+        if wheel_dir is None:
+            return self.enabled and self.wheel.consumed
+        key = self.side | btns << TRIGGER_BITS | WHEEL_TRIGGERS[wheel_dir]
+        executed = self.execute_shortcut(key)
+        self.wheel.consumed = executed
+        return self.record_stop(btns, executed)
@@ -1,8 +1,23 @@
-from typing import Any, Callable, List, Dict, Optional, Union, Tuple, no_type_check
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    List,
+    Literal,
+    Dict,
+    FrozenSet,
+    Optional,
+    Union,
+    Tuple,
+    no_type_check,
+)
+from collections import deque
 from enum import Enum
-import datetime
+import functools
 import json
+import time
 
+from anki.cards import Card
 from anki.hooks import wrap
 from aqt import mw, gui_hooks
 from aqt.qt import *
@@ -10,6 +25,30 @@ from aqt.utils import tooltip
 from aqt.webview import AnkiWebView, WebContent
 import aqt
 
+from . import codec, macro, snapshot
+from .codec import (
+    BUTTON_MASK,
+    SIDE_A,
+    SIDE_Q,
+    SIDE_X,
+    TRIGGER_MASK,
+    TRIGGER_WHEEL_DOWN,
+    TRIGGER_WHEEL_UP,
+)
+from .core import (
+    ACTION_NAMES,
+    ACTION_SET,
+    SOURCE_QT,
+    SOURCE_WEB,
+    Dispatcher,
+    ProfileMap,
+    SequenceMatcher,
+    WheelEngine,
+    compile_macros,
+)
+from .latency import LatencyRecorder
+from .overlay import show_feedback
+
 
 def WEBVIEW_TARGETS() -> List[AnkiWebView]:
     # Implemented as a function so attributes are resolved when called.
@@ -17,13 +56,16 @@ def WEBVIEW_TARGETS() -> List[AnkiWebView]:
     return [mw.web, mw.bottomWeb]
 
 
-config = mw.addonManager.getConfig(__name__)
+config = snapshot.get()
 
 
 def refresh_config() -> None:
+    """Rebuilds shortcuts if config changed."""
     global config
-    config = mw.addonManager.getConfig(__name__)
-    manager.refresh_shortcuts()
+    snapshot.reload()
+    if snapshot.get().digest != config.digest:
+        config = snapshot.get()
+        manager.refresh_shortcuts()
 
 
 def turn_on() -> None:
@@ -47,40 +89,56 @@ def toggle_on_off() -> None:
         tooltip("Enabled hotmouse")
 
 
-def answer_again() -> None:
-    if mw.reviewer.state == "question":
-        mw.reviewer.state = "answer"
-    mw.reviewer._answerCard(1)
-
-
-def answer_hard() -> None:
-    if mw.reviewer.state == "question":
-        mw.reviewer.state = "answer"
-    cnt = mw.col.sched.answerButtons(mw.reviewer.card)
-    if cnt == 4:
-        mw.reviewer._answerCard(2)
+# {number of answer buttons: {action: ease}}
+EASES: Dict[int, Dict[str, Literal[1, 2, 3, 4]]] = {
+    2: {"again": 1, "good": 2},
+    3: {"again": 1, "good": 2, "easy": 3},
+    4: {"again": 1, "hard": 2, "good": 3, "easy": 4},
+}
 
 
-def answer_good() -> None:
-    if mw.reviewer.state == "question":
-        mw.reviewer.state = "answer"
-    cnt = mw.col.sched.answerButtons(mw.reviewer.card)
-    if cnt == 2:
-        mw.reviewer._answerCard(2)
-    elif cnt == 3:
-        mw.reviewer._answerCard(2)
-    elif cnt == 4:
-        mw.reviewer._answerCard(3)
+class AnswerButtons:
+    """Number of answer buttons of the current card.
 
+    The v3 scheduler always has 4 buttons, so sched.answerButtons() is not called.
+    Otherwise the count is cached until the reviewer shows a question.
+    """
 
-def answer_easy() -> None:
+    def __init__(self) -> None:
+        self.sched: Any = None
+        self.fixed = False
+        self.card_id: Optional[int] = None
+        self.count = 4
+
+    def invalidate(self) -> None:
+        self.card_id = None
+
+    def get(self) -> int:
+        sched = mw.col.sched
+        if sched is not self.sched:
+            self.sched = sched
+            self.fixed = getattr(sched, "version", 0) >= 3
+            self.card_id = None
+            self.count = 4
+        if self.fixed:
+            return 4
+        card = mw.reviewer.card
+        if card.id != self.card_id:
+            self.card_id = card.id
+            self.count = sched.answerButtons(card)
+        return self.count
+
+
+answer_buttons = AnswerButtons()
+
+
+def answer_card(action: str) -> None:
+    """`action` is one of "again", "hard", "good", "easy"."""
     if mw.reviewer.state == "question":
         mw.reviewer.state = "answer"
-    cnt = mw.col.sched.answerButtons(mw.reviewer.card)
-    if cnt == 3:
-        mw.reviewer._answerCard(3)
-    elif cnt == 4:
-        mw.reviewer._answerCard(4)
+    ease = EASES[answer_buttons.get()].get(action)
+    if ease:
+        mw.reviewer._answerCard(ease)
 
 
 def toggle_auto_advance() -> None:
@@ -93,17 +151,17 @@ def toggle_auto_advance() -> None:
         )
 
 
-ACTIONS = {
+ACTIONS: Dict[str, Callable[[], Any]] = {
     "<none>": lambda: None,
     "on": turn_on,
     "off": turn_off,
     "on_off": toggle_on_off,
     "undo": lambda: mw.onUndo() if mw.form.actionUndo.isEnabled() else None,
     "show_ans": lambda: mw.reviewer._getTypedAnswer(),
-    "again": answer_again,
-    "hard": answer_hard,
-    "good": answer_good,
-    "easy": answer_easy,
+    "again": lambda: answer_card("again"),
+    "hard": lambda: answer_card("hard"),
+    "good": lambda: answer_card("good"),
+    "easy": lambda: answer_card("easy"),
     "delete": lambda: mw.reviewer.onDelete(),
     "suspend_card": lambda: mw.reviewer.onSuspendCard(),
     "suspend_note": lambda: mw.reviewer.onSuspend(),
@@ -122,7 +180,71 @@ ACTIONS = {
     "copy": lambda: mw.reviewer.web.triggerPageAction(QWebEnginePage.WebAction.Copy),
     "paste": lambda: mw.reviewer.web.triggerPageAction(QWebEnginePage.WebAction.Paste),
 }
-ACTION_OPTS = list(ACTIONS.keys())
+ACTION_OPTS = ACTION_NAMES
+
+
+def register_macros() -> None:
+    """Adds valid macros of config to ACTIONS, replacing previously added macros."""
+    for name in set(ACTIONS) - ACTION_SET:
+        del ACTIONS[name]
+    for name, steps in compile_macros(config.macros).items():
+        ACTIONS[name] = functools.partial(macro.run_macro, name, steps, ACTIONS)
+
+
+latency = LatencyRecorder()
+
+
+class ActionExecutor:
+    """Runs actions on the next event loop turn, in the order they were queued.
+
+    Actions answer cards, write to the collection and re-render the reviewer,
+    which shouldn't happen while qt is still delivering the mouse event.
+    """
+
+    def __init__(self) -> None:
+        # (action, latency trace)
+        self.queue: Deque[Tuple[str, Optional[List[float]]]] = deque()
+        self.scheduled = False
+        self.executed = 0
+        self.max_depth = 0
+        self.last_ms = 0.0
+        self.total_ms = 0.0
+
+    def enqueue(self, action: str, trace: Optional[List[float]] = None) -> None:
+        self.queue.append((action, trace))
+        self.max_depth = max(self.max_depth, len(self.queue))
+        if not self.scheduled:
+            self.scheduled = True
+            QTimer.singleShot(0, self.run)
+
+    def run(self) -> None:
+        self.scheduled = False
+        try:
+            while self.queue:
+                action, trace = self.queue.popleft()
+                start = time.perf_counter()
+                try:
+                    ACTIONS[action]()
+                finally:
+                    end = time.perf_counter()
+                    self.last_ms = (end - start) * 1000
+                    self.total_ms += self.last_ms
+                    self.executed += 1
+                    if trace is not None:
+                        trace.extend((start, end))
+                        latency.action_done(action, trace)
+        finally:
+            # If an action raised, run the remaining actions later
+            if self.queue and not self.scheduled:
+                self.scheduled = True
+                QTimer.singleShot(0, self.run)
+
+    def stats(self) -> str:
+        avg_ms = self.total_ms / self.executed if self.executed else 0
+        return (
+            f"actions: {self.executed} run, queue {len(self.queue)} (max {self.max_depth}), "
+            f"last {self.last_ms:.1f}ms, avg {avg_ms:.1f}ms"
+        )
 
 
 class Button(Enum):
@@ -141,38 +263,40 @@ class Button(Enum):
             return None
 
 
-class WheelDir(Enum):
-    DOWN = -1
-    UP = 1
+# Codec button bits are the same as qt's
+RIGHT_BUTTON = codec.BUTTON_BITS["right"]
+XBUTTONS = codec.BUTTON_BITS["xbutton1"] | codec.BUTTON_BITS["xbutton2"]
 
-    @classmethod
-    def from_qt(cls, angle_delta: QPoint) -> Optional["WheelDir"]:
-        delta = angle_delta.y()
-        if delta > 0:
-            return cls.UP
-        elif delta < 0:
-            return cls.DOWN
-        else:
-            return None
 
-    @classmethod
-    def from_web(cls, delta: int) -> Optional["WheelDir"]:
-        """web and qt has opposite delta sign"""
-        if delta < 0:
-            return cls.UP
-        elif delta > 0:
-            return cls.DOWN
-        else:
-            return None
+def button_bits(qbtns: Any) -> int:
+    """Returns qt mouse buttons as int bitmask.
+
+    PyQt6 buttons are enums with int value, PyQt5 buttons are ints.
+    """
+    return int(getattr(qbtns, "value", qbtns))
+
 
+class HotmouseManager(Dispatcher):
+    """Feeds Qt mouse events to dispatcher, and runs resolved actions."""
 
-class HotmouseManager:
-    has_wheel_hotkey: bool
+    # Whether wheel events should be handled in qt event filter
+    qt_wheel: bool
+    # JSON of wheel bindings for detect_wheel.js
+    web_bindings: str
+    # Event types that event filter should handle
+    event_types: FrozenSet[QEvent.Type]
+    profiles: ProfileMap
 
     def __init__(self) -> None:
-        self.enabled = config["default_enabled"]
-        self.last_scroll_time = datetime.datetime.now()
-        self.add_menu()
+        super().__init__(config.default_enabled, QApplication.doubleClickInterval())
+        # Kept up to date by state and reviewer hooks
+        self.reviewing = False
+        self.action: Optional[QAction] = None
+        self.click_timer = QTimer()
+        self.click_timer.setSingleShot(True)
+        self.click_timer.setInterval(self.click_interval_ms)
+        self.click_timer.timeout.connect(self.flush_clicks)
+        self.executor = ActionExecutor()
         self.refresh_shortcuts()
 
     def add_menu(self) -> None:
@@ -182,6 +306,8 @@ class HotmouseManager:
         self.update_menu()
 
     def update_menu(self) -> None:
+        if self.action is None:
+            return
         if self.enabled:
             label = "Disable Review Hotmouse"
         else:
@@ -191,108 +317,171 @@ class HotmouseManager:
     def enable(self) -> None:
         self.enabled = True
         self.update_menu()
+        self.update_web_bindings()
 
     def disable(self) -> None:
         self.enabled = False
         self.update_menu()
+        self.update_web_bindings()
+
+    def update_web_bindings(self) -> None:
+        """Builds wheel bindings for detect_wheel.js, and push it to reviewer webview."""
+        self.web_bindings = json.dumps(
+            {
+                "threshold": config.threshold_wheel_ms,
+                "scrollEdge": config.wheel_scroll_edge,
+                "bindings": self.wheel_bindings(),
+            }
+        )
+        self.push_web_bindings()
+
+    def push_web_bindings(self) -> None:
+        if not self.reviewing:
+            return
+        side = "q" if self.side == SIDE_Q else "a" if self.side == SIDE_A else None
+        mw.reviewer.web.eval(
+            f"window.ReviewHotmouse?.update({self.web_bindings}, {json.dumps(side)})"
+        )
+
+    def sequence_changed(self) -> None:
+        """Binds wheel steps of the started sequence in detect_wheel.js until timeout."""
+        if not self.reviewing:
+            return
+        pending = json.dumps(self.pending_wheel_bindings())
+        timeout = int(SequenceMatcher.TIMEOUT * 1000)
+        mw.reviewer.web.eval(f"window.ReviewHotmouse?.pending({pending}, {timeout})")
 
     def refresh_shortcuts(self) -> None:
-        self.has_wheel_hotkey = False
-        for shortcut in config["shortcuts"]:
-            if "wheel" in shortcut:
-                self.has_wheel_hotkey = True
-                break
+        register_macros()
+        self.load(
+            config.shortcuts,
+            config.threshold_wheel_ms,
+            {name: profile.shortcuts for name, profile in config.profiles.items()},
+            set(ACTIONS) - ACTION_SET,
+        )
+        self.profiles = ProfileMap(
+            {
+                deck: name
+                for name, profile in config.profiles.items()
+                for deck in profile.decks
+            },
+            {
+                note_type: name
+                for name, profile in config.profiles.items()
+                for note_type in profile.note_types
+            },
+        )
+        self.debug = config.z_debug
+        latency.enabled = config.z_latency
+        self.apply_table()
         print("has wheel", self.has_wheel_hotkey)
 
-    def uses_btn(self, btn: Button) -> bool:
-        for shortcut in config["shortcuts"]:
-            if btn.name in shortcut:
-                return True
-        return False
+    def apply_table(self) -> None:
+        """Sets up event handling for the selected profile's table."""
+        event_types = set(MOUSE_EVENT_TYPES)
+        # Mouse move is the most frequent event, so only handle it if needed
+        if self.gesture_holds:
+            event_types.add(QEvent.Type.MouseMove)
+        # Qt sends the second press of a quick double click as a separate event type
+        if self.multi_clicks:
+            event_types.add(QEvent.Type.MouseButtonDblClick)
+        self.event_types = frozenset(event_types)
+        # Only detect_wheel.js knows the scroll position
+        self.qt_wheel = self.has_wheel_hotkey and not config.wheel_scroll_edge
+        self.update_web_bindings()
+
+    def select_card_profile(self, card: Card) -> None:
+        """Switches to the profile of card's deck or note type."""
+        if len(self.tables) == 1:
+            return
+        profile = self.profiles.lookup(
+            card.odid or card.did,
+            card.note().mid,
+            lambda did: mw.col.decks.name(did),  # type: ignore
+            lambda mid: mw.col.models.get(mid)["name"],  # type: ignore
+        )
+        if self.select(profile):
+            self.apply_table()
 
-    @staticmethod
-    def get_pressed_buttons(qbuttons: "Qt.MouseButton") -> List[Button]:
-        """Returns list of pressed button names, excluding the button that caused the trigger"""
-        buttons = []
-        for b in Button:
-            if qbuttons & b.value:  # type: ignore
-                buttons.append(b)
-        return buttons
-
-    @staticmethod
-    def build_hotkey(
-        btns: List[Button],
-        wheel: Optional[WheelDir] = None,
-        click: Optional[Button] = None,
-    ) -> str:
-        """One and only one of wheel or click must be passed as an argument."""
-        if mw.reviewer.state == "question":
-            shortcut_key_str = "q"
-        elif mw.reviewer.state == "answer":
-            shortcut_key_str = "a"
-        else:
-            shortcut_key_str = "x"  # ignore transition
-
-        for btn in btns:
-            shortcut_key_str += "_press_{}".format(btn.name)
-        if click:
-            shortcut_key_str += "_click_{}".format(click.name)
-        if wheel == WheelDir.UP:
-            shortcut_key_str += "_wheel_up"
-        elif wheel == WheelDir.DOWN:
-            shortcut_key_str += "_wheel_down"
-        return shortcut_key_str
-
-    def execute_shortcut(self, hotkey_str: str) -> bool:
-        """Returns True if shortcut exists and is executed."""
-        if self.enabled and config["z_debug"]:
-            tooltip(hotkey_str)
-        shortcuts = config["shortcuts"]
-        if hotkey_str in shortcuts:
-            action_str = shortcuts[hotkey_str]
-        else:
-            action_str = ""
+    def show_debug(self, key: int, action_str: str) -> None:
+        detail = f"{hotmouseEventFilter.stats()}<br>{self.executor.stats()}"
+        if key & TRIGGER_MASK in (TRIGGER_WHEEL_UP, TRIGGER_WHEEL_DOWN):
+            detail += f"<br>{self.wheel.debug_state()}"
+            detail += f"<br>{self.wheel_sources.stats()}"
+        show_feedback(f"{codec.decode(key)} → {action_str or '-'}", detail)
 
-        if not self.enabled and action_str not in ("on", "on_off"):
-            return False
-        if not action_str:
-            return False
-        if config["tooltip"]:
-            tooltip(action_str)
-        ACTIONS[action_str]()
-        return True
+    def execute_shortcut(self, key: int) -> bool:
+        if latency.enabled:
+            latency.mark()
+        return super().execute_shortcut(key)
+
+    def run_action(self, key: int, action: str) -> None:
+        if config.tooltip and not config.z_debug:
+            show_feedback(action)
+        self.executor.enqueue(action, latency.take() if latency.enabled else None)
+
+    def start_click_timer(self) -> None:
+        self.click_timer.start()
+
+    def stop_click_timer(self) -> None:
+        self.click_timer.stop()
+
+    def flush_clicks(self) -> bool:
+        if latency.enabled and self.clicks.key is not None:
+            latency.start()
+        return super().flush_clicks()
 
     def on_mouse_press(self, event: QMouseEvent) -> bool:
         """Returns True if shortcut is executed"""
-        btns = self.get_pressed_buttons(event.buttons())
-        pressed = Button.from_qt(event.button())
-        if pressed is None:
+        pressed = button_bits(event.button())
+        if not pressed & BUTTON_MASK:
+            print(f"Review Hotmouse: Unknown Button Pressed: {event.button()}")
             return False
-        btns.remove(pressed)
-        hotkey_str = self.build_hotkey(btns, click=pressed)
-        return self.execute_shortcut(hotkey_str)
+        btns = button_bits(event.buttons()) & BUTTON_MASK & ~pressed
+        if self.gesture_holds:
+            pos = event.position()
+            return self.on_press(pressed, btns, pos.x(), pos.y())
+        return self.on_press(pressed, btns, 0, 0)
+
+    def on_mouse_move(self, event: QMouseEvent) -> bool:
+        """Returns True if gesture shortcut is executed"""
+        if not self.stroke.active:
+            return False
+        pos = event.position()
+        btns = button_bits(event.buttons()) & BUTTON_MASK
+        return self.on_move(btns, pos.x(), pos.y())
 
     def on_mouse_scroll(self, event: QWheelEvent) -> bool:
         """Returns True if shortcut is executed"""
-        wheel_dir = WheelDir.from_qt(event.angleDelta())
-        if wheel_dir is None:
+        delta = event.angleDelta().y()
+        if not delta:
+            pixels = event.pixelDelta().y()
+            delta = pixels * WheelEngine.NOTCH // WheelEngine.PIXELS_PER_NOTCH
+        if not delta:
             return False
-        return self.handle_scroll(wheel_dir, event.buttons())
+        now = time.monotonic()
+        self.wheel_sources.accept(SOURCE_QT, now)
+        btns = button_bits(event.buttons()) & BUTTON_MASK
+        return self.handle_scroll(delta, btns, now)
 
-    def handle_scroll(self, wheel_dir: WheelDir, qbtns: "Qt.MouseButton") -> bool:
-        """Returns True if shortcut is executed"""
-        curr_time = datetime.datetime.now()
-        time_diff = curr_time - self.last_scroll_time
-        self.last_scroll_time = curr_time
-        if time_diff.total_seconds() * 1000 > config["threshold_wheel_ms"]:
-            btns = self.get_pressed_buttons(qbtns)
-            hotkey_str = self.build_hotkey(btns, wheel=wheel_dir)
-            return self.execute_shortcut(hotkey_str)
-        else:
-            return self.enabled
+
+MOUSE_EVENT_TYPES = frozenset(
+    (
+        QEvent.Type.MouseButtonPress,
+        QEvent.Type.MouseButtonRelease,
+        QEvent.Type.Wheel,
+        QEvent.Type.ContextMenu,
+    )
+)
 
 
 class HotmouseEventFilter(QObject):
+    def __init__(self) -> None:
+        super().__init__()
+        # Number of events passed to eventFilter, and events it stopped.
+        self.inspected = 0
+        self.handled = 0
+
     @no_type_check
     def eventFilter(self, obj: QObject, event: QEvent) -> bool:
         """Because Mouse events are triggered on QWebEngineView's child widgets.
@@ -301,29 +490,49 @@ class HotmouseEventFilter(QObject):
         This is so clicking on answer buttons and selecting text works.
         And `left_click` shortcut should be discouraged because of above.
         """
-        if mw.state == "review":
-            if event.type() == QEvent.Type.MouseButtonPress:
-                if manager.on_mouse_press(event):
-                    return True
-            elif event.type() == QEvent.Type.MouseButtonRelease:
-                if manager.enabled:
-                    btn = Button.from_qt(event.button())
-                    if btn is None:
-                        return False
-                    # Prevent back/forward navigation
-                    if btn == Button.xbutton1 or btn == Button.xbutton2:
-                        if manager.uses_btn(btn):
-                            return True
-            elif event.type() == QEvent.Type.Wheel:
-                if manager.has_wheel_hotkey and manager.on_mouse_scroll(event):
+        self.inspected += 1
+        event_type = event.type()
+        if event_type in manager.event_types:
+            if latency.enabled:
+                latency.start()
+            if manager.reviewing and self.handle_mouse_event(event_type, event):
+                self.handled += 1
+                return True
+        elif event_type == QEvent.Type.ChildAdded:
+            if config.event_filter_mode == "recursive":
+                add_event_filter(event.child())
+            elif obj in WEBVIEW_TARGETS():
+                # Render widget may be recreated, and set as focus proxy afterwards.
+                QTimer.singleShot(0, install_focus_proxy_filters)
+        return False
+
+    @no_type_check
+    def handle_mouse_event(self, event_type: QEvent.Type, event: QEvent) -> bool:
+        """Returns True if event should be stopped."""
+        if event_type in (
+            QEvent.Type.MouseButtonPress,
+            QEvent.Type.MouseButtonDblClick,
+        ):
+            return manager.on_mouse_press(event)
+        elif event_type == QEvent.Type.MouseMove:
+            return manager.on_mouse_move(event)
+        elif event_type == QEvent.Type.MouseButtonRelease:
+            if manager.stroke.active and manager.on_release():
+                return True
+            if manager.enabled:
+                btn = button_bits(event.button()) & XBUTTONS
+                # Prevent back/forward navigation
+                if btn and manager.stopped_btn(btn):
                     return True
-            elif event.type() == QEvent.Type.ContextMenu:
-                if manager.enabled and manager.uses_btn(Button.right):
-                    return True  # ignore event
-        if event.type() == QEvent.Type.ChildAdded:
-            add_event_filter(event.child())
+        elif event_type == QEvent.Type.Wheel:
+            return manager.qt_wheel and manager.on_mouse_scroll(event)
+        elif event_type == QEvent.Type.ContextMenu:
+            return manager.enabled and manager.stopped_btn(RIGHT_BUTTON)
         return False
 
+    def stats(self) -> str:
+        return f"events: {self.inspected} inspected, {self.handled} handled"
+
 
 def add_event_filter(object: QObject) -> None:
     """Add event filter to the widget and its children, to master"""
@@ -334,10 +543,36 @@ def add_event_filter(object: QObject) -> None:
         add_event_filter(w)
 
 
+def install_focus_proxy_filters() -> None:
+    """Add event filter only to the webviews and their render widget.
+
+    Mouse events are delivered to the render widget, which is the webview's focus proxy.
+    Can be called multiple times, as installing the same filter again is a no-op.
+    Resolves WEBVIEW_TARGETS() on every call, so reassigned webviews are handled.
+    """
+    for target in WEBVIEW_TARGETS():
+        # To detect render widget recreation
+        target.installEventFilter(hotmouseEventFilter)
+        proxy = target.focusProxy()
+        if proxy is not None:
+            proxy.installEventFilter(hotmouseEventFilter)
+
+
+def remove_focus_proxy_filters() -> None:
+    for target in WEBVIEW_TARGETS():
+        target.removeEventFilter(hotmouseEventFilter)
+        proxy = target.focusProxy()
+        if proxy is not None:
+            proxy.removeEventFilter(hotmouseEventFilter)
+
+
 @no_type_check
 def install_event_handlers() -> None:
-    for target in WEBVIEW_TARGETS():
-        add_event_filter(target)
+    manager.add_menu()
+    # In focus proxy mode, filters are installed when review starts
+    if config.event_filter_mode == "recursive":
+        for target in WEBVIEW_TARGETS():
+            add_event_filter(target)
     # Not sure why, but context menu events are not 100% filtered through event filters
     if hasattr(AnkiWebView, "contextMenuEvent"):
         AnkiWebView.contextMenuEvent = wrap(
@@ -347,6 +582,45 @@ def install_event_handlers() -> None:
         AnkiWebView.contextMenuEvent = on_context_menu
 
 
+def on_state_did_change(new_state: str, old_state: str) -> None:
+    """Event filter is only attached while reviewing.
+
+    In recursive mode, the filter is short-circuited by `manager.reviewing` instead.
+    """
+    reviewing = new_state == "review"
+    if reviewing == manager.reviewing:
+        return
+    manager.reviewing = reviewing
+    if not reviewing:
+        manager.side = SIDE_X
+    if config.event_filter_mode == "recursive":
+        return
+    if reviewing:
+        install_focus_proxy_filters()
+    else:
+        remove_focus_proxy_filters()
+
+
+def on_show_question(card: Card) -> None:
+    manager.side = SIDE_Q
+    manager.select_card_profile(card)
+    answer_buttons.invalidate()
+    if latency.enabled:
+        latency.card_shown()
+    manager.push_web_bindings()
+
+
+def on_show_answer(card: Card) -> None:
+    manager.side = SIDE_A
+    if latency.enabled:
+        latency.card_shown()
+    manager.push_web_bindings()
+
+
+def on_answer_card(reviewer: aqt.reviewer.Reviewer, card: Card, ease: int) -> None:
+    manager.side = SIDE_X  # ignore transition
+
+
 def on_context_menu(
     target: QWebEngineView,
     ev: QContextMenuEvent,
@@ -355,7 +629,7 @@ def on_context_menu(
     if target not in WEBVIEW_TARGETS():
         _old(target, ev)
         return
-    if manager.enabled and mw.state == "review" and manager.uses_btn(Button.right):
+    if manager.enabled and manager.reviewing and manager.stopped_btn(RIGHT_BUTTON):
         return None  # ignore event
     _old(target, ev)
 
@@ -369,9 +643,14 @@ def add_context_menu_action(wv: AnkiWebView, m: QMenu) -> None:
 def inject_web_content(web_content: WebContent, context: Optional[Any]) -> None:
     """Wheel events are not reliably detected with qt's event handler
     when the reviewer is scrollable. (For long cards)
+
+    The script only messages python when a wheel step matches a binding,
+    see `HotmouseManager.update_web_bindings`.
     """
     if not isinstance(context, aqt.reviewer.Reviewer):
         return
+    if config.event_filter_mode != "recursive":
+        install_focus_proxy_filters()
     addon_package = mw.addonManager.addonFromModule(__name__)
     web_content.js.append(f"/_addons/{addon_package}/web/detect_wheel.js")
 
@@ -386,15 +665,24 @@ def handle_js_message(
     if not message.startswith(addon_key):
         return handled
 
-    req = json.loads(message[len(addon_key) :])  # type: Dict[str, Any]
-    if req["key"] == "wheel":
-        wheel_delta = req["value"]  # type: int
-        wheel_dir = WheelDir.from_web(wheel_delta)
-        if wheel_dir is None:
-            return (False, None)
-        qbtns = mw.app.mouseButtons()
-        executed = manager.handle_scroll(wheel_dir, qbtns)
-        return (executed, executed)
+    # Message format: `{key}:{value}`
+    key, _, value = message[len(addon_key) :].partition(":")
+    if key == "wheel":
+        # Drop duplicate of a scroll that qt event filter already handled
+        now = time.monotonic()
+        if not manager.wheel_sources.accept(SOURCE_WEB, now):
+            return (True, False)
+        if latency.enabled:
+            latency.start()
+        # Accumulated deltaY of the wheel step, in pixels
+        wheel_delta = float(value)
+        # web and qt has opposite delta sign
+        delta = int(-wheel_delta * WheelEngine.NOTCH / WheelEngine.PIXELS_PER_NOTCH)
+        if not delta:
+            return (True, False)
+        btns = button_bits(mw.app.mouseButtons()) & BUTTON_MASK
+        executed = manager.handle_scroll(delta, btns, now)
+        return (True, executed)
 
     return handled
 
@@ -407,3 +695,7 @@ gui_hooks.main_window_did_init.append(install_event_handlers)  # 2.1.28
 gui_hooks.webview_will_show_context_menu.append(add_context_menu_action)  # 2.1.20
 gui_hooks.webview_will_set_content.append(inject_web_content)  # 2.1.22
 gui_hooks.webview_did_receive_js_message.append(handle_js_message)  # 2.1.20
+gui_hooks.state_did_change.append(on_state_did_change)  # 2.1.20
+gui_hooks.reviewer_did_show_question.append(on_show_question)  # 2.1.20
+gui_hooks.reviewer_did_show_answer.append(on_show_answer)  # 2.1.20
+gui_hooks.reviewer_did_answer_card.append(on_answer_card)  # 2.1.20
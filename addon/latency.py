@@ -0,0 +1,106 @@
+from typing import Dict, List, Optional, Tuple
+import time
+
+# Time between each timestamp of a trace
+STAGES = ("hotkey", "lookup", "queue", "action", "render")
+PERCENTILES = (50, 95, 99)
+
+
+class RingBuffer:
+    """Keeps the last `size` values."""
+
+    def __init__(self, size: int) -> None:
+        self.values = [0.0] * size
+        self.size = size
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.values[self.count % self.size] = value
+        self.count += 1
+
+    def percentile(self, p: int) -> float:
+        n = min(self.count, self.size)
+        if n == 0:
+            return 0.0
+        values = sorted(self.values[:n])
+        return values[min(n - 1, n * p // 100)]
+
+
+class LatencyRecorder:
+    """Records time spent in each stage between a mouse event and the card being shown.
+
+    A trace is a list of timestamps:
+    event received, hotkey built, shortcut found, action started, action finished, card shown.
+    Callers should check `enabled` before calling any method, so it costs nothing when disabled.
+    """
+
+    # Card shown later than this isn't counted as caused by the action
+    RENDER_TIMEOUT = 1.0
+
+    def __init__(self, size: int = 256) -> None:
+        self.enabled = False
+        self.size = size
+        self.trace: List[float] = []
+        # Trace waiting for the card to be shown
+        self.pending: Optional[Tuple[str, List[float]]] = None
+        # {action: {stage: durations in ms}}
+        self.histograms: Dict[str, Dict[str, RingBuffer]] = {}
+        # Time spent importing the add-on at startup, including config migration
+        self.import_ms = 0.0
+
+    def start(self) -> None:
+        self.trace = [time.perf_counter()]
+
+    def mark(self) -> None:
+        self.trace.append(time.perf_counter())
+
+    def take(self) -> Optional[List[float]]:
+        """Ends the trace when shortcut is found. Returns None if trace is incomplete."""
+        trace = self.trace
+        self.trace = []
+        if len(trace) != 2:
+            return None
+        trace.append(time.perf_counter())
+        return trace
+
+    def action_done(self, action: str, trace: List[float]) -> None:
+        if self.pending is not None:
+            self.record(*self.pending)
+        self.pending = (action, trace)
+
+    def card_shown(self) -> None:
+        if self.pending is None:
+            return
+        action, trace = self.pending
+        self.pending = None
+        now = time.perf_counter()
+        if now - trace[-1] < self.RENDER_TIMEOUT:
+            trace.append(now)
+        self.record(action, trace)
+
+    def record(self, action: str, trace: List[float]) -> None:
+        if action not in self.histograms:
+            self.histograms[action] = {
+                stage: RingBuffer(self.size) for stage in STAGES + ("total",)
+            }
+        histograms = self.histograms[action]
+        for i in range(1, len(trace)):
+            histograms[STAGES[i - 1]].add((trace[i] - trace[i - 1]) * 1000)
+        histograms["total"].add((trace[-1] - trace[0]) * 1000)
+
+    def report_html(self) -> str:
+        html = f"Add-on loaded in {self.import_ms:.1f}ms at startup.<br>"
+        if not self.histograms:
+            return html + "No latency recorded yet."
+        header = "".join(f"<th>p{p}</th>" for p in PERCENTILES)
+        for action, histograms in self.histograms.items():
+            html += f"<h3>{action}</h3>"
+            html += f"<table><tr><th>stage</th><th>count</th>{header}</tr>"
+            for stage in STAGES + ("total",):
+                hist = histograms[stage]
+                cells = "".join(
+                    f"<td>{hist.percentile(p):.2f}ms</td>" for p in PERCENTILES
+                )
+                html += f"<tr><td>{stage}</td><td>{hist.count}</td>{cells}</tr>"
+            html += "</table>"
+        return html
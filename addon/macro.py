@@ -0,0 +1,80 @@
+"""Macros run several actions from a single hotkey.
+
+Steps that only write to the collection run as one collection operation,
+so the macro is a single undo entry and the reviewer is refreshed once.
+Other steps run after it, in order.
+"""
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Mapping, Sequence
+
+from anki.cards import Card
+from aqt import mw
+
+if TYPE_CHECKING:
+    # OpChanges is only in 2.1.45+, which `run_macro` checks for at runtime
+    from anki.collection import Collection, OpChanges
+
+MARKED_TAG = "marked"
+
+
+def toggle_mark(col: "Collection", card: Card) -> None:
+    note = card.note()
+    if note.has_tag(MARKED_TAG):
+        col.tags.bulk_remove([note.id], MARKED_TAG)
+    else:
+        col.tags.bulk_add([note.id], MARKED_TAG)
+
+
+def toggle_flag(flag: int) -> Callable[["Collection", Card], Any]:
+    """Same as reviewer, setting the card's current flag removes it."""
+    return lambda col, card: col.set_user_flag_for_cards(
+        0 if card.user_flag() == flag else flag, [card.id]
+    )
+
+
+# {action: function(col, card)} of actions that only write to the collection
+COLLECTION_STEPS: Dict[str, Callable[["Collection", Card], Any]] = {
+    "delete": lambda col, card: col.remove_notes([card.nid]),
+    "suspend_card": lambda col, card: col.sched.suspend_cards([card.id]),
+    "suspend_note": lambda col, card: col.sched.suspend_notes([card.nid]),
+    "bury_card": lambda col, card: col.sched.bury_cards([card.id]),
+    "bury_note": lambda col, card: col.sched.bury_notes([card.nid]),
+    "mark": toggle_mark,
+    "red": toggle_flag(1),
+    "orange": toggle_flag(2),
+    "green": toggle_flag(3),
+    "blue": toggle_flag(4),
+}
+
+
+def run_macro(
+    name: str, steps: Sequence[str], actions: Mapping[str, Callable[[], Any]]
+) -> None:
+    """Runs collection steps as one operation, then the other steps with `actions`."""
+    card = mw.reviewer.card
+    batched = [step for step in steps if step in COLLECTION_STEPS]
+    others = [step for step in steps if step not in COLLECTION_STEPS]
+
+    # Undo entries can be merged since 2.1.45
+    if card is None or not batched or not hasattr(mw.col, "merge_undo_entries"):
+        for step in steps:
+            actions[step]()
+        return
+
+    from aqt.operations import CollectionOp
+
+    def op(col: "Collection") -> "OpChanges":
+        target = col.add_custom_undo_entry(f"Review Hotmouse: {name}")
+        for step in batched:
+            COLLECTION_STEPS[step](col, card)
+        return col.merge_undo_entries(target)
+
+    def on_success(changes: "OpChanges") -> None:
+        # Reviewer only redraws the card for tag changes, not the mark icon
+        if "mark" in batched and not changes.study_queues:
+            mw.reviewer.card.load()
+            mw.reviewer._update_mark_icon()
+        for step in others:
+            actions[step]()
+
+    CollectionOp(parent=mw, op=op).success(on_success).run_in_background()
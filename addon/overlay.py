@@ -0,0 +1,63 @@
+from typing import Deque, Optional
+from collections import deque
+
+from aqt import mw
+from aqt.qt import *
+
+
+class FeedbackOverlay(QLabel):
+    """Shows the last few triggered hotkeys and actions.
+
+    Unlike aqt.utils.tooltip() which creates a new widget and timer on every call,
+    the same widget and timer are reused.
+    """
+
+    HISTORY = 5
+    PERIOD = 3000
+
+    def __init__(self, parent: QWidget) -> None:
+        super().__init__(parent, Qt.WindowType.ToolTip)
+        self.history: Deque[str] = deque(maxlen=self.HISTORY)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.on_timeout)
+        self.setTextFormat(Qt.TextFormat.RichText)
+        self.setFrameStyle(QFrame.Shape.Panel)
+        self.setLineWidth(2)
+        self.setMargin(10)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        self.setAutoFillBackground(True)
+        palette = self.palette()
+        palette.setColor(QPalette.ColorRole.Window, QColor("#feffc4"))
+        palette.setColor(QPalette.ColorRole.WindowText, QColor("#000000"))
+        self.setPalette(palette)
+
+    def show_entry(self, entry: str, detail: str = "") -> None:
+        """Adds `entry` to history. `detail` is only shown until the next entry."""
+        self.history.append(entry)
+        text = "<br>".join(self.history)
+        if detail:
+            text += f"<hr>{detail}"
+        self.setText(text)
+        self.adjustSize()
+        parent = self.parentWidget()
+        pos = parent.mapToGlobal(QPoint(0, 0))
+        self.move(pos.x() + 10, pos.y() + parent.height() - self.height() - 100)
+        self.show()
+        self.timer.start(self.PERIOD)
+
+    def on_timeout(self) -> None:
+        self.hide()
+        self.history.clear()
+
+
+_overlay: Optional[FeedbackOverlay] = None
+
+
+def show_feedback(entry: str, detail: str = "") -> None:
+    """Overlay is created on first use."""
+    global _overlay
+    if _overlay is None:
+        _overlay = FeedbackOverlay(mw)
+    _overlay.show_entry(entry, detail)
@@ -0,0 +1,99 @@
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+from types import MappingProxyType
+import hashlib
+import json
+
+from aqt import mw
+
+
+class Profile(NamedTuple):
+    """Shortcuts used instead of the top-level shortcuts in some decks or note types."""
+
+    decks: Tuple[str, ...]
+    note_types: Tuple[str, ...]
+    shortcuts: Mapping[str, str]
+
+    @classmethod
+    def from_dict(cls, conf: Dict[str, Any]) -> "Profile":
+        return cls(
+            decks=tuple(conf.get("decks", [])),
+            note_types=tuple(conf.get("note_types", [])),
+            shortcuts=MappingProxyType(dict(conf.get("shortcuts", {}))),
+        )
+
+
+class ConfigSnapshot(NamedTuple):
+    """Immutable, typed view of the add-on config.
+
+    `digest` is the hash of the config content,
+    so derived data only needs to be rebuilt when it changes.
+    """
+
+    shortcuts: Mapping[str, str]
+    # {name: profile}
+    profiles: Mapping[str, Profile]
+    # {name: actions}
+    macros: Mapping[str, Any]
+    default_enabled: bool
+    threshold_wheel_ms: int
+    wheel_scroll_edge: bool
+    tooltip: bool
+    z_debug: bool
+    z_latency: bool
+    event_filter_mode: str
+    # (major, minor)
+    version: Tuple[int, int]
+    digest: str
+
+    @classmethod
+    def from_dict(cls, conf: Dict[str, Any]) -> "ConfigSnapshot":
+        content = json.dumps(conf, sort_keys=True)
+        version = conf.get("version", {})
+        return cls(
+            shortcuts=MappingProxyType(dict(conf.get("shortcuts", {}))),
+            profiles=MappingProxyType(
+                {
+                    name: Profile.from_dict(profile)
+                    for name, profile in conf.get("profiles", {}).items()
+                }
+            ),
+            macros=MappingProxyType(dict(conf.get("macros", {}))),
+            default_enabled=conf.get("default_enabled", True),
+            threshold_wheel_ms=conf.get("threshold_wheel_ms", 350),
+            wheel_scroll_edge=conf.get("wheel_scroll_edge", False),
+            tooltip=conf.get("tooltip", False),
+            z_debug=conf.get("z_debug", False),
+            z_latency=conf.get("z_latency", False),
+            event_filter_mode=conf.get("event_filter_mode", "focus_proxy"),
+            version=(version.get("major", -1), version.get("minor", -1)),
+            digest=hashlib.sha1(content.encode()).hexdigest(),
+        )
+
+
+_snapshot: Optional[ConfigSnapshot] = None
+
+
+def read_raw() -> Dict[str, Any]:
+    """Returns config dict as stored, which may be modified and passed to `write`."""
+    return mw.addonManager.getConfig(__name__)
+
+
+def write(conf: Dict[str, Any]) -> None:
+    global _snapshot
+    mw.addonManager.writeConfig(__name__, conf)
+    _snapshot = ConfigSnapshot.from_dict(conf)
+
+
+def get() -> ConfigSnapshot:
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = ConfigSnapshot.from_dict(read_raw())
+    return _snapshot
+
+
+def reload() -> bool:
+    """Reads config again. Returns True if config content changed."""
+    global _snapshot
+    old_digest = _snapshot.digest if _snapshot is not None else None
+    _snapshot = ConfigSnapshot.from_dict(read_raw())
+    return _snapshot.digest != old_digest
@@ -1,14 +1,90 @@
-document.addEventListener("wheel", (ev) => {
-    let req = {
-        "key": "wheel",
-        "value": ev.deltaY
+(() => {
+    // Mirrors python's WheelEngine. Python is only messaged
+    // when a wheel step matches a binding of the current card side.
+    const LINE_HEIGHT = 40
+    const PIXELS_PER_NOTCH = 50
+    const BUTTON_MASK = 31
+
+    // Set by python, see HotmouseManager.update_web_bindings()
+    let threshold = 350
+    // Only trigger wheel hotkeys when the page can't scroll further
+    let scrollEdge = false
+    let bindings = { q: [], a: [] }
+    // Wheel steps of a started sequence, bound until pendingUntil
+    let pending = { q: [], a: [] }
+    let pendingUntil = -Infinity
+    let side = null
+
+    let accumulated = 0
+    let lastTime = -Infinity
+    let fired = false
+    // Whether this gesture scrolled the page, which shouldn't trigger hotkeys
+    let scrolledPage = false
+
+    window.ReviewHotmouse = {
+        update: (state, newSide) => {
+            threshold = state.threshold
+            scrollEdge = state.scrollEdge
+            bindings = state.bindings
+            side = newSide
+        },
+        pending: (newPending, timeout) => {
+            pending = newPending
+            pendingUntil = performance.now() + timeout
+        }
     }
-    let req_str = JSON.stringify(req)
-    let resp = pycmd("ReviewHotmouse#" + req_str)
-    if (resp) {
-        ev.preventDefault()
-        ev.stopPropagation()
+
+    const isBound = (binding, now) => {
+        return bindings[side].includes(binding)
+            || (now < pendingUntil && pending[side].includes(binding))
+    }
+
+    const canScroll = (delta) => {
+        const el = document.scrollingElement
+        if (delta < 0) {
+            return el.scrollTop > 0
+        }
+        return el.scrollTop + el.clientHeight < el.scrollHeight - 1
     }
-})
 
+    document.addEventListener("wheel", (ev) => {
+        if (side === null) {
+            return
+        }
+        if (bindings[side].length === 0 && ev.timeStamp >= pendingUntil) {
+            return
+        }
+        let delta = ev.deltaY
+        if (ev.deltaMode === WheelEvent.DOM_DELTA_LINE) {
+            delta *= LINE_HEIGHT
+        }
+        if (delta === 0) {
+            return
+        }
+        const now = ev.timeStamp
+        if (now - lastTime > threshold || delta * accumulated < 0) {
+            accumulated = 0
+            fired = false
+            scrolledPage = false
+        }
+        lastTime = now
+        if (scrollEdge && (scrolledPage || canScroll(delta))) {
+            scrolledPage = true
+            return
+        }
+        accumulated += delta
 
+        // web and qt has opposite delta sign
+        const up = delta < 0 ? 1 : 0
+        const binding = (ev.buttons & BUTTON_MASK) * 2 + up
+        if (!isBound(binding, now)) {
+            return
+        }
+        ev.preventDefault()
+        ev.stopPropagation()
+        if (!fired && Math.abs(accumulated) >= PIXELS_PER_NOTCH) {
+            fired = true
+            pycmd("ReviewHotmouse#wheel:" + accumulated)
+        }
+    }, { passive: false })
+})()
@@ -50,10 +50,13 @@ class MockAddonManager:
         return None
 
 
+# Shared between tests, as add-on modules keep reference to mw from the first import
+mw = Mock()
+
+
 @pytest.fixture(autouse=True)
 def mock_addonmanager(monkeypatch: Any) -> None:
     """Mock mw.addonManager"""
-    mw = Mock()
     mw.configure_mock(addonManager=MockAddonManager())
     monkeypatch.setattr(aqt, "mw", mw)
 
@@ -0,0 +1,268 @@
+"""Micro-benchmarks of the mouse event dispatch hot path.
+
+Scenarios only report their numbers, unless REVIEW_HOTMOUSE_BENCH_GATE=1 is set.
+Then each scenario is compared to `benchmark_baseline.json`, and the run fails if
+a scenario is slower than baseline by more than REVIEW_HOTMOUSE_BENCH_TOLERANCE
+times (default 3), allocates more memory per event, or retains more memory blocks
+per event. Time is measured relative to a calibration loop run in the same process,
+so the baseline is usable across machines. Allocated bytes depend on the Python
+version, so write the baseline with the version that is compared to it.
+Set REVIEW_HOTMOUSE_BENCH_UPDATE=1 to write new baseline. Use `pytest -s` to see the report.
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple
+from pathlib import Path
+import itertools
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+import pytest
+
+BASELINE_PATH = Path(__file__).parent / "benchmark_baseline.json"
+TOLERANCE = float(os.environ.get("REVIEW_HOTMOUSE_BENCH_TOLERANCE", "3"))
+UPDATE = bool(os.environ.get("REVIEW_HOTMOUSE_BENCH_UPDATE"))
+GATE = bool(os.environ.get("REVIEW_HOTMOUSE_BENCH_GATE"))
+EVENTS = 1000
+# Timed runs of EVENTS events, the fastest is used
+REPEATS = 5
+# Events measured with tracemalloc, which is much slower
+TRACED_EVENTS = 500
+# Retained blocks per event allowed over baseline, for noise
+BLOCKS_SLACK = 0.01
+# Allocated bytes per event allowed over baseline, for noise
+BYTES_SLACK = 8
+
+
+class Scenario(NamedTuple):
+    name: str
+    config_size: int
+    enabled: bool
+    threshold_wheel_ms: int
+    # "press", "wheel", "core_press", "handle_scroll", "web_duplicate"
+    # or "execute_shortcut"
+    path: str
+    # pressed buttons, excluding clicked button
+    press: List[str]
+
+
+SCENARIOS = [
+    Scenario("press_default", 0, True, 350, "press", []),
+    Scenario("press_held_default", 0, True, 350, "press", ["left"]),
+    Scenario("press_64", 64, True, 350, "press", ["left"]),
+    Scenario("press_all", 448, True, 350, "press", ["left", "middle"]),
+    Scenario("press_disabled", 448, False, 350, "press", []),
+    Scenario("wheel_throttled", 0, True, 350, "wheel", []),
+    Scenario("wheel_every_event", 448, True, 0, "wheel", ["middle"]),
+    Scenario("wheel_disabled", 448, False, 0, "wheel", []),
+    Scenario("core_press", 448, True, 350, "core_press", ["left", "middle"]),
+    Scenario("handle_scroll", 448, True, 0, "handle_scroll", []),
+    Scenario("web_duplicate", 448, True, 0, "web_duplicate", []),
+    Scenario("execute_shortcut", 448, True, 350, "execute_shortcut", []),
+]
+
+
+def make_shortcuts(size: int) -> Dict[str, str]:
+    """Returns default shortcuts if size is 0, otherwise `size` distinct shortcuts."""
+    if size == 0:
+        config = json.loads(
+            (Path(__file__).parent.parent / "addon/config.json").read_text()
+        )
+        return config["shortcuts"]
+    from addon.codec import BUTTONS
+
+    btns = BUTTONS
+    triggers = [f"click_{b}" for b in btns] + ["wheel_up", "wheel_down"]
+    hotkeys = []
+    for side in ("q", "a"):
+        for n in range(len(btns) + 1):
+            for pressed in itertools.combinations(btns, n):
+                for trigger in triggers:
+                    press = "".join(f"_press_{b}" for b in pressed)
+                    hotkeys.append(f"{side}{press}_{trigger}")
+    return {hotkey: "<none>" for hotkey in hotkeys[:size]}
+
+
+def make_runner(scenario: Scenario) -> Callable[[], Any]:
+    from unittest.mock import Mock
+    import aqt
+    from aqt.qt import QEvent, QMouseEvent, QPoint, QPointF, Qt, QWheelEvent
+    from addon import codec, event
+    from addon.core import SOURCE_QT
+
+    manager = event.manager
+    press = Qt.MouseButton.NoButton
+    for btn in scenario.press:
+        press |= event.Button[btn].value
+    clicked = Qt.MouseButton.RightButton
+    pos = QPointF(10, 10)
+
+    if scenario.path == "press":
+        mouse_event = QMouseEvent(
+            QEvent.Type.MouseButtonPress,
+            pos,
+            pos,
+            clicked,
+            press | clicked,
+            Qt.KeyboardModifier.NoModifier,
+        )
+        return lambda: manager.on_mouse_press(mouse_event)
+    if scenario.path == "wheel":
+        wheel_event = QWheelEvent(
+            pos,
+            pos,
+            QPoint(0, 0),
+            QPoint(0, -120),
+            press,
+            Qt.KeyboardModifier.NoModifier,
+            Qt.ScrollPhase.NoScrollPhase,
+            False,
+        )
+        return lambda: manager.on_mouse_scroll(wheel_event)
+    # Qt-free paths take buttons as int bitmask
+    btns = 0
+    for btn in scenario.press:
+        btns |= codec.BUTTON_BITS[btn]
+    if scenario.path == "core_press":
+        right = codec.BUTTON_BITS["right"]
+        return lambda: manager.on_press(right, btns, 0, 0)
+    if scenario.path == "handle_scroll":
+        return lambda: manager.handle_scroll(-120, btns, time.monotonic())
+    if scenario.path == "web_duplicate":
+        # Qt filter received the scroll just now
+        manager.wheel_sources.last_time[SOURCE_QT] = math.inf
+        message = "ReviewHotmouse#wheel:-100"
+        reviewer = Mock(spec=aqt.reviewer.Reviewer)
+        return lambda: event.handle_js_message((False, None), message, reviewer)
+    if scenario.path == "execute_shortcut":
+        key = codec.encode("a_press_left_click_right")
+        return lambda: manager.execute_shortcut(key)
+    raise ValueError(scenario.path)
+
+
+def measure(run: Callable[[], Any], clear: Callable[[], None]) -> Dict[str, float]:
+    calibrate = make_calibration()
+    for _ in range(100):
+        run()
+        calibrate()
+    clear()
+    # Runs alternate, so both are timed at the same machine speed
+    elapsed = calibration = math.inf
+    for _ in range(REPEATS):
+        calibration = min(calibration, timed_ns(calibrate))
+        elapsed = min(elapsed, timed_ns(run))
+        clear()
+    blocks = sys.getallocatedblocks()
+    for _ in range(REPEATS):
+        timed_ns(run)
+        clear()
+    blocks = sys.getallocatedblocks() - blocks
+    # Measuring itself allocates, which is the allocation of an empty event
+    allocated = traced_bytes(run) - traced_bytes(lambda: None)
+    clear()
+    return {
+        "events_per_sec": EVENTS / elapsed * 1e9,
+        "ns_per_event": elapsed / EVENTS,
+        "time_ratio": elapsed / calibration,
+        "blocks_per_event": max(blocks, 0) / (EVENTS * REPEATS),
+        "bytes_per_event": max(allocated, 0),
+    }
+
+
+def timed_ns(run: Callable[[], Any]) -> int:
+    """Returns ns taken by EVENTS events."""
+    start = time.perf_counter_ns()
+    for _ in range(EVENTS):
+        run()
+    return time.perf_counter_ns() - start
+
+
+def make_calibration() -> Callable[[], Any]:
+    """Returns an event of dict lookups and bit operations.
+
+    Scenario times are divided by its time, to cancel out the machine
+    and interpreter speed.
+    """
+    table = {key: str(key) for key in range(1 << 10)}
+    keys = itertools.cycle(range(1 << 12))
+
+    def run() -> bool:
+        key = next(keys)
+        return table.get(key >> 2 | key & 3, "") != ""
+
+    return run
+
+
+def traced_bytes(run: Callable[[], Any]) -> float:
+    """Returns average bytes allocated during an event, including temporaries.
+
+    Peak traced memory during an event is above the start if it allocates anything,
+    even if it is freed before the event ends.
+    """
+    allocated = 0
+    tracemalloc.start()
+    try:
+        for _ in range(TRACED_EVENTS):
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            run()
+            allocated += tracemalloc.get_traced_memory()[1] - start
+    finally:
+        tracemalloc.stop()
+    return allocated / TRACED_EVENTS
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=[s.name for s in SCENARIOS])
+def test_dispatch_benchmark(scenario: Scenario, monkeypatch: Any) -> None:
+    from addon import event
+    from addon.core import WheelSources
+
+    config = event.config._replace(
+        shortcuts=make_shortcuts(scenario.config_size),
+        threshold_wheel_ms=scenario.threshold_wheel_ms,
+        tooltip=False,
+        z_debug=False,
+        z_latency=False,
+    )
+    monkeypatch.setattr(event, "config", config)
+    manager = event.manager
+    monkeypatch.setattr(manager, "enabled", scenario.enabled)
+    monkeypatch.setattr(manager, "reviewing", True)
+    monkeypatch.setattr(manager, "side", event.SIDE_A)
+    monkeypatch.setattr(manager, "wheel_sources", WheelSources())
+    manager.refresh_shortcuts()
+
+    try:
+        result = measure(make_runner(scenario), manager.executor.queue.clear)
+    finally:
+        monkeypatch.undo()
+        manager.refresh_shortcuts()
+    print(
+        f"\n{scenario.name}: {result['events_per_sec']:,.0f} events/s, "
+        f"{result['ns_per_event']:.0f}ns/event "
+        f"({result['time_ratio']:.1f}x calibration), "
+        f"{result['bytes_per_event']:.0f} allocated bytes/event, "
+        f"{result['blocks_per_event']:.3f} retained blocks/event"
+    )
+
+    if UPDATE:
+        baseline = (
+            json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        )
+        baseline[scenario.name] = {
+            "time_ratio": round(result["time_ratio"], 2),
+            "blocks_per_event": round(result["blocks_per_event"], 3),
+            "bytes_per_event": round(result["bytes_per_event"]),
+        }
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=4, sort_keys=True) + "\n")
+        return
+    if not GATE:
+        return
+
+    baseline = json.loads(BASELINE_PATH.read_text())[scenario.name]
+    assert result["time_ratio"] <= baseline["time_ratio"] * TOLERANCE
+    assert result["blocks_per_event"] <= baseline["blocks_per_event"] + BLOCKS_SLACK
+    assert result["bytes_per_event"] <= baseline["bytes_per_event"] + BYTES_SLACK
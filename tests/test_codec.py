@@ -0,0 +1,69 @@
+def test_encode() -> None:
+    from addon.codec import encode, decode
+
+    for hotkey in (
+        "q_click_right",
+        "a_wheel_down",
+        "q_press_left_click_right",
+        "a_press_left_press_middle_wheel_up",
+        "a_press_right_press_xbutton2_click_xbutton1",
+        "q_press_right_gesture_left",
+        "a_doubleclick_middle",
+    ):
+        key = encode(hotkey)
+        assert key is not None
+        assert decode(key) == hotkey
+
+    # press order doesn't matter
+    assert encode("q_press_right_press_left_click_middle") == encode(
+        "q_press_left_press_right_click_middle"
+    )
+    assert encode("q_click_right") != encode("a_click_right")
+
+    for invalid in ("", "q", "q_click", "x_click_left", "q_press_left", "q_wheel_left"):
+        assert encode(invalid) is None
+    # gesture needs a pressed button
+    for invalid in ("q_gesture_up", "q_press_left_gesture_middle"):
+        assert encode(invalid) is None
+
+
+def test_parse() -> None:
+    from addon.codec import Hotkey, parse, BUTTON_BITS, TRIGGERS
+
+    assert parse("a_press_xbutton1_press_left_wheel_up") == Hotkey(
+        1,
+        BUTTON_BITS["left"] | BUTTON_BITS["xbutton1"],
+        TRIGGERS[("wheel", "up")],
+    )
+    assert parse("q_press_left_click_right").pairs() == [
+        ("press", "left"),
+        ("click", "right"),
+    ]
+
+
+def test_canonical() -> None:
+    from addon.codec import canonical, is_valid
+
+    assert (
+        canonical("a_press_xbutton1_press_right_press_left_wheel_up")
+        == "a_press_left_press_right_press_xbutton1_wheel_up"
+    )
+    assert (
+        canonical(
+            "q_press_middle_press_left_click_xbutton1_then_press_right_press_left_wheel_down"
+        )
+        == "q_press_left_press_middle_click_xbutton1_then_press_left_press_right_wheel_down"
+    )
+    assert canonical("q_click_nothing") is None
+    assert is_valid("q_click_xbutton1_then_wheel_down")
+    assert not is_valid("q_click_xbutton1_then_wheel_left")
+    assert not is_valid("q_click_xbutton1_then_q_wheel_down")
+
+
+def test_button_bits() -> None:
+    from addon.codec import BUTTONS, BUTTON_BITS
+    from addon.event import Button
+
+    assert [b.name for b in Button] == BUTTONS
+    for btn in Button:
+        assert btn.value.value == BUTTON_BITS[btn.name]
@@ -1,5 +1,7 @@
+from typing import Any
+
+
 def test_v1_compat() -> None:
-    from aqt import mw
     from addon.compat.v1 import v1_compat
 
     old_config = {
@@ -14,9 +16,8 @@ def test_v1_compat() -> None:
         "tooltip": False,
         "z_debug": False,
     }
-    mw.addonManager.writeConfig(__name__, old_config)
-    v1_compat()
-    config = mw.addonManager.getConfig(__name__)
+    old_config_copy = dict(old_config)
+    config, notice = v1_compat(old_config)
     assert config == {
         "shortcuts": {
             "q_press_left_press_right_click_middle": "off",
@@ -28,25 +29,17 @@ def test_v1_compat() -> None:
         "tooltip": False,
         "z_debug": False,
     }
+    assert "a_click_xbutton3" in notice
+    # Doesn't modify passed config
+    assert old_config == old_config_copy
 
     # Test that shortcuts don't get deleted
-    v1_compat()
-    assert config == {
-        "shortcuts": {
-            "q_press_left_press_right_click_middle": "off",
-            "q_wheel_down": "<none>",
-            "q_click_right": "good",
-            "a_click_right": "undo",
-        },
-        "threshold_wheel_ms": 200,
-        "tooltip": False,
-        "z_debug": False,
-    }
+    config2, notice = v1_compat(config)
+    assert config2 == config
+    assert notice == ""
 
     old_config = {"q_press_left": "on", "q_click_left": "off"}
-    mw.addonManager.writeConfig(__name__, old_config)
-    v1_compat()
-    config = mw.addonManager.getConfig(__name__)
+    config, _ = v1_compat(old_config)
     assert config == {"shortcuts": {"q_click_left": "off"}}
 
 
@@ -84,3 +77,35 @@ def test_modify_hotkeys_ending_with_press() -> None:
         "a_press_left_press_middle_click_right": "hard",
         "a_press_right_click_right": "<none>",
     }
+
+
+def test_no_event_import(monkeypatch: Any) -> None:
+    """Migration runs before event builds the manager from config."""
+    import importlib
+    import sys
+    import addon.compat.v1
+
+    monkeypatch.delitem(sys.modules, "addon.event", raising=False)
+    importlib.reload(addon.compat.v1)
+    assert "addon.event" not in sys.modules
+
+
+def test_v1_compat_keeps_config_keys() -> None:
+    from addon.compat.v1 import v1_compat
+
+    old_config = {
+        "q_click_right": "good",
+        "profiles": {},
+        "macros": {},
+        "default_enabled": True,
+    }
+    config, notice = v1_compat(old_config)
+    assert config == {
+        "shortcuts": {"q_click_right": "good"},
+        "profiles": {},
+        "macros": {},
+        "default_enabled": True,
+    }
+    assert "profiles" not in notice
+    assert "macros" not in notice
+    assert "default_enabled" not in notice
@@ -1,3 +1,6 @@
+from typing import Dict
+
+
 def test_sort_hotkey_btn() -> None:
     from addon.config import HotkeyTabManager
 
@@ -13,3 +16,48 @@ def test_sort_hotkey_btn() -> None:
     h3 = "q_press_right_click_left"
     a3 = h3
     assert HotkeyTabManager.sort_hotkey_btn(h3) == a3
+
+
+def test_hotkey_model() -> None:
+    from addon.config import OPTS, HotkeyModel, hotkey_text
+
+    model = HotkeyModel("q")
+    model.load(
+        {
+            "q_click_right": "undo",
+            "q_doubleclick_right": "again",
+            "q_click_xbutton1_then_wheel_down": "suspend_note",
+            "q_click_nothing": "undo",
+            "q_wheel_up": "nothing",
+            "a_click_left": "good",
+        }
+    )
+    assert model.rowCount() == 3
+    assert model.data(model.index(0, HotkeyModel.DELAY))
+    assert not model.data(model.index(2, HotkeyModel.DELAY))
+    assert model.data(model.index(2, HotkeyModel.HOTKEY)) == (
+        "click xbutton1  →  wheel down"
+    )
+
+    assert model.setData(model.index(1, HotkeyModel.HOTKEY), "q_click_left")
+    assert not model.data(model.index(0, HotkeyModel.DELAY))
+    assert model.setData(model.index(1, HotkeyModel.ACTION), "good")
+    # invalid hotkey keeps the old value
+    assert not model.setData(model.index(1, HotkeyModel.HOTKEY), "q_gesture_up")
+    assert model.data(model.index(1, HotkeyModel.HOTKEY)) == "click left"
+    model.add_row("q_wheel_up", "easy")
+    model.removeRows(0, 1)
+    hotkeys: Dict[str, str] = {}
+    model.get_data(hotkeys)
+    assert hotkeys == {
+        "q_click_left": "good",
+        "q_click_xbutton1_then_wheel_down": "suspend_note",
+        "q_wheel_up": "easy",
+    }
+
+    # macros
+    model.load({"q_click_right": "flag_bury"})
+    assert model.rowCount() == 0
+    model.load({"q_click_right": "flag_bury"}, OPTS.action + ["flag_bury"])
+    assert model.rowCount() == 1
+    assert hotkey_text("q_gesture_up") == "q_gesture_up"
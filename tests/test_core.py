@@ -0,0 +1,381 @@
+from typing import Any, List
+import time
+
+
+def make_recorder() -> Any:
+    """Returns a dispatcher that records actions in `actions` instead of running them."""
+    from addon.core import Dispatcher
+
+    class Recorder(Dispatcher):
+        def __init__(self) -> None:
+            super().__init__(True, 400)
+            self.actions: List[str] = []
+
+        def run_action(self, key: int, action: str) -> None:
+            self.actions.append(action)
+
+    return Recorder()
+
+
+def test_compile_shortcuts() -> None:
+    from addon.codec import encode
+    from addon.core import compile_shortcuts
+
+    table = compile_shortcuts(
+        {"q_click_right": "undo", "a_wheel_up": "again", "q_click_left": "what"}
+    )
+    assert table == {
+        encode("q_click_right"): "undo",
+        encode("a_wheel_up"): "again",
+    }
+
+
+def test_wheel_engine() -> None:
+    from addon.core import WheelEngine, WheelDir
+
+    wheel = WheelEngine(350)
+    # trackpad: small deltas accumulate, and trigger only once per gesture
+    steps = [wheel.feed(-10, i * 0.01) for i in range(30)]
+    assert [s for s in steps if s] == [WheelDir.DOWN]
+    assert steps.index(WheelDir.DOWN) == 11
+
+    # new gesture after threshold
+    assert wheel.feed(120, 1.0) == WheelDir.UP
+    assert wheel.feed(120, 1.1) is None
+    # direction change starts a new gesture
+    assert wheel.feed(-120, 1.2) == WheelDir.DOWN
+    assert wheel.feed(-120, 1.5) is None
+    assert wheel.feed(-120, 2.0) == WheelDir.DOWN
+
+
+def test_stroke_recognizer() -> None:
+    from addon.codec import GESTURE_DIRS
+    from addon.core import StrokeRecognizer
+
+    stroke = StrokeRecognizer()
+    stroke.start(100, 100)
+    assert stroke.feed(130, 95) is None
+    assert GESTURE_DIRS[stroke.feed(40, 100)] == "left"
+    # recognized only once per stroke
+    assert stroke.feed(0, 100) is None
+
+    stroke.start(0, 0)
+    assert GESTURE_DIRS[stroke.feed(5, 70)] == "down"
+    # diagonal
+    stroke.start(0, 0)
+    assert stroke.feed(60, -60) is None
+
+
+def test_click_counter() -> None:
+    from addon.core import ClickCounter
+
+    clicks = ClickCounter(0.4)
+    assert clicks.feed(1, 0.0) == 1
+    assert clicks.feed(1, 0.3) == 2
+    assert clicks.feed(1, 0.6) == 3
+    # too slow
+    assert clicks.feed(1, 1.1) == 1
+    # different hotkey
+    assert clicks.feed(2, 1.2) == 1
+
+
+def test_click_waits() -> None:
+    from addon.core import click_waits
+
+    shortcuts = {
+        "q_click_right": "undo",
+        "q_doubleclick_right": "again",
+        "q_click_left": "good",
+        "a_click_middle": "undo",
+        "a_doubleclick_middle": "again",
+        "a_tripleclick_middle": "easy",
+    }
+    assert click_waits(shortcuts, 400) == {
+        "q_click_right": 400,
+        "a_click_middle": 400,
+        "a_doubleclick_middle": 400,
+    }
+
+
+def test_multi_click() -> None:
+    from addon import codec
+
+    dispatcher = make_recorder()
+    dispatcher.load(
+        {
+            "q_click_left": "good",
+            "q_click_right": "again",
+            "q_doubleclick_right": "hard",
+            "q_tripleclick_right": "undo",
+        },
+        350,
+    )
+    dispatcher.side = codec.SIDE_Q
+    right = codec.encode("q_click_right")
+    left = codec.encode("q_click_left")
+    # not delayed
+    dispatcher.handle_click(left)
+    assert dispatcher.actions == ["good"]
+    dispatcher.handle_click(right)
+    dispatcher.handle_click(right)
+    assert dispatcher.actions == ["good"]
+    dispatcher.handle_click(right)
+    assert dispatcher.actions[1:] == ["undo"]
+    # timeout
+    dispatcher.handle_click(right)
+    dispatcher.flush_clicks()
+    assert dispatcher.actions[2:] == ["again"]
+    # another click ends waiting clicks
+    dispatcher.handle_click(right)
+    dispatcher.handle_click(right)
+    dispatcher.handle_click(left)
+    assert dispatcher.actions[3:] == ["hard", "good"]
+
+    # no double click hotkey, so double click falls back to click
+    dispatcher.load({"q_click_right": "again", "q_tripleclick_right": "undo"}, 350)
+    dispatcher.handle_click(right)
+    dispatcher.handle_click(right)
+    dispatcher.flush_clicks()
+    assert dispatcher.actions[5:] == ["again"]
+
+    # no click hotkey, so the first click passes through
+    dispatcher.load({"q_doubleclick_left": "good"}, 350)
+    left_bit = codec.BUTTON_BITS["left"]
+    assert not dispatcher.on_press(left_bit, 0, 0, 0)
+    assert not dispatcher.flush_clicks()
+    assert not dispatcher.on_press(left_bit, 0, 0, 0)
+    assert dispatcher.on_press(left_bit, 0, 0, 0)
+    assert dispatcher.actions[6:] == ["good"]
+
+
+def test_dispatcher() -> None:
+    from addon.codec import BUTTON_BITS, SIDE_A, SIDE_Q
+
+    dispatcher = make_recorder()
+    dispatcher.load(
+        {
+            "q_press_left_click_right": "off",
+            "a_click_right": "good",
+            "a_wheel_down": "on",
+            "a_click_xbutton1_then_click_middle": "delete",
+        },
+        350,
+    )
+    left = BUTTON_BITS["left"]
+    right = BUTTON_BITS["right"]
+    middle = BUTTON_BITS["middle"]
+    dispatcher.side = SIDE_Q
+    assert dispatcher.on_press(right, left, 0, 0)
+    assert dispatcher.stopped_btn(right) and dispatcher.stopped_btn(left)
+    assert not dispatcher.stopped_btn(middle)
+    assert not dispatcher.on_press(right, 0, 0, 0)
+    assert not dispatcher.stopped_btn(right)
+    dispatcher.side = SIDE_A
+    assert dispatcher.on_press(right, 0, 0, 0)
+    # sequence step is consumed without action
+    assert dispatcher.on_press(BUTTON_BITS["xbutton1"], 0, 0, 0)
+    assert dispatcher.on_press(middle, 0, 0, 0)
+    assert dispatcher.actions == ["off", "good", "delete"]
+
+    # Only actions that turn on the add-on work when disabled
+    dispatcher.enabled = False
+    assert not dispatcher.on_press(right, 0, 0, 0)
+    assert dispatcher.handle_scroll(-120, 0, 0.0)
+    assert dispatcher.actions[3:] == ["on"]
+    assert dispatcher.wheel_bindings() == {"q": [], "a": [0]}
+
+
+def test_gesture_press() -> None:
+    from addon.codec import BUTTON_BITS, SIDE_Q
+
+    left = BUTTON_BITS["left"]
+    right = BUTTON_BITS["right"]
+    dispatcher = make_recorder()
+    dispatcher.load({"q_press_left_gesture_down": "good"}, 350)
+    dispatcher.side = SIDE_Q
+    # unbound press isn't stopped, so the web view still gets it
+    assert not dispatcher.on_press(left, 0, 0, 0)
+    assert not dispatcher.on_release()
+    assert not dispatcher.on_press(left, 0, 0, 0)
+    assert dispatcher.on_move(left, 0, 100)
+    assert dispatcher.actions == ["good"]
+
+    # bound click waits for release
+    dispatcher.load({"q_press_left_gesture_down": "good", "q_click_left": "again"}, 350)
+    assert dispatcher.on_press(left, 0, 0, 0)
+    assert dispatcher.on_release()
+    assert dispatcher.actions[1:] == ["again"]
+    assert dispatcher.on_press(left, 0, 0, 0)
+    assert dispatcher.on_move(left, 0, 100)
+    assert not dispatcher.on_release()
+    assert dispatcher.actions[2:] == ["good"]
+    assert not dispatcher.on_press(right, 0, 0, 0)
+
+
+def test_sequence_matcher() -> None:
+    from addon.codec import encode
+    from addon.core import SequenceMatcher, compile_sequences
+
+    sequences = compile_sequences(
+        {
+            "q_click_xbutton1_then_wheel_down": "suspend_note",
+            "q_click_xbutton1_then_click_xbutton1_then_click_right": "delete",
+            "q_click_right": "undo",
+            "q_click_xbutton1_then_wheel_left": "delete",
+        }
+    )
+    x1 = encode("q_click_xbutton1")
+    right = encode("q_click_right")
+    wheel = encode("q_wheel_down")
+    assert sequences == {
+        (x1, wheel): "suspend_note",
+        (x1, x1, right): "delete",
+    }
+
+    matcher = SequenceMatcher()
+    matcher.compile(sequences)
+    assert matcher.feed(x1, 0.0) is None
+    assert matcher.state
+    assert matcher.feed(wheel, 0.3) == "suspend_note"
+    assert not matcher.state
+
+    # timeout
+    matcher.feed(x1, 1.0)
+    assert matcher.feed(wheel, 1.6) is None
+    assert not matcher.state
+
+    # failed step can start a new sequence
+    matcher.feed(x1, 2.0)
+    matcher.feed(x1, 2.1)
+    assert matcher.feed(x1, 2.2) is None
+    assert matcher.state
+    assert matcher.feed(wheel, 2.3) == "suspend_note"
+    assert matcher.feed(right, 2.4) is None
+    assert not matcher.state
+
+
+def test_sequence_wheel_bindings() -> None:
+    from addon.codec import BUTTON_BITS, SIDE_Q
+
+    dispatcher = make_recorder()
+    dispatcher.load({"q_click_xbutton1_then_wheel_down": "good"}, 350)
+    dispatcher.side = SIDE_Q
+    # wheel step doesn't block scrolling until the sequence is started
+    assert dispatcher.wheel_bindings() == {"q": [], "a": []}
+    assert dispatcher.pending_wheel_bindings() == {"q": [], "a": []}
+    assert dispatcher.on_press(BUTTON_BITS["xbutton1"], 0, 0, 0)
+    assert dispatcher.pending_wheel_bindings() == {"q": [0], "a": []}
+    assert dispatcher.handle_scroll(-120, 0, time.monotonic())
+    assert dispatcher.actions == ["good"]
+    assert dispatcher.pending_wheel_bindings() == {"q": [], "a": []}
+
+
+def test_profile_map() -> None:
+    from addon.core import DEFAULT_PROFILE, ProfileMap
+
+    decks = {1: "Anatomy", 2: "Anatomy::Bones", 3: "Spanish", 4: "Spanish::Verbs"}
+    note_types = {10: "Basic", 11: "Image Occlusion"}
+    looked_up: List[int] = []
+
+    def deck_name(did: int) -> str:
+        looked_up.append(did)
+        return decks[did]
+
+    profiles = ProfileMap(
+        {"Anatomy": "scroll", "Spanish::Verbs": "verbs"}, {"Image Occlusion": "io"}
+    )
+    lookup = lambda did, mid: profiles.lookup(did, mid, deck_name, note_types.get)
+    assert lookup(1, 10) == "scroll"
+    # subdeck
+    assert lookup(2, 11) == "scroll"
+    assert lookup(4, 10) == "verbs"
+    assert lookup(3, 11) == "io"
+    assert lookup(3, 10) == DEFAULT_PROFILE
+    # names are only looked up once per deck
+    assert lookup(2, 10) == "scroll"
+    assert looked_up == [1, 2, 4, 3]
+
+
+def test_select_profile() -> None:
+    from addon.codec import BUTTON_BITS, SIDE_A
+    from addon.core import DEFAULT_PROFILE
+
+    dispatcher = make_recorder()
+    dispatcher.load(
+        {"a_wheel_down": "good", "a_click_right": "undo"},
+        0,
+        {"scroll": {"a_click_right": "good"}},
+    )
+    dispatcher.side = SIDE_A
+    assert dispatcher.has_wheel_hotkey
+    assert dispatcher.select("scroll")
+    assert not dispatcher.select("scroll")
+    assert not dispatcher.has_wheel_hotkey
+    assert not dispatcher.handle_scroll(-120, 0, 1.0)
+    assert dispatcher.on_press(BUTTON_BITS["right"], 0, 0, 0)
+    assert dispatcher.select(DEFAULT_PROFILE)
+    assert dispatcher.handle_scroll(-120, 0, 2.0)
+    # unknown profile uses default
+    assert not dispatcher.select("deleted")
+    assert dispatcher.actions == ["good", "good"]
+
+
+def test_compile_macros() -> None:
+    from addon.codec import BUTTON_BITS, SIDE_Q
+    from addon.core import compile_macros
+
+    macros = compile_macros(
+        {
+            "flag_bury": ["red", "bury_note"],
+            "empty": [],
+            "nested": ["flag_bury", "good"],
+            "good": ["easy"],
+            "string": "mark",
+        }
+    )
+    assert macros == {"flag_bury": ("red", "bury_note")}
+
+    dispatcher = make_recorder()
+    dispatcher.load(
+        {"q_click_right": "flag_bury", "q_click_left": "unknown"}, 350, {}, macros
+    )
+    dispatcher.side = SIDE_Q
+    assert dispatcher.on_press(BUTTON_BITS["right"], 0, 0, 0)
+    assert not dispatcher.on_press(BUTTON_BITS["left"], 0, 0, 0)
+    assert dispatcher.actions == ["flag_bury"]
+
+
+def test_wheel_sources() -> None:
+    from addon.core import SOURCE_QT, SOURCE_WEB, WheelSources
+
+    sources = WheelSources()
+    # web only, qt filter isn't receiving wheel events
+    assert sources.accept(SOURCE_WEB, 0.0)
+    assert sources.accept(SOURCE_WEB, 0.1)
+    # same scroll from both sources
+    assert sources.accept(SOURCE_QT, 1.0)
+    assert not sources.accept(SOURCE_WEB, 1.05)
+    assert sources.accept(SOURCE_QT, 1.1)
+    assert not sources.accept(SOURCE_WEB, 1.2)
+    # qt stopped receiving events
+    assert sources.accept(SOURCE_WEB, 2.0)
+    assert sources.received == [2, 5]
+    assert sources.dropped == [0, 2]
+    assert sources.stats() == "wheel events: 2 qt, 5 web, 2 duplicates dropped"
+
+
+def test_stopped_btn_across_sides() -> None:
+    from addon.codec import BUTTON_BITS, SIDE_A, SIDE_Q
+
+    dispatcher = make_recorder()
+    dispatcher.load({"q_click_right": "good"}, 350)
+    right = BUTTON_BITS["right"]
+    dispatcher.side = SIDE_Q
+    assert dispatcher.on_press(right, 0, 0, 0)
+    # Answer is shown before release, context menu is still stopped
+    dispatcher.side = SIDE_A
+    assert dispatcher.stopped_btn(right)
+    # Press passed through on answer side, so its context menu shows
+    assert not dispatcher.on_press(right, 0, 0, 0)
+    dispatcher.side = SIDE_Q
+    assert not dispatcher.stopped_btn(right)
@@ -0,0 +1,175 @@
+from typing import Any, Callable, List
+
+
+def test_actions() -> None:
+    from addon.core import ACTION_NAMES
+    from addon.event import ACTIONS
+
+    assert list(ACTIONS) == ACTION_NAMES
+
+
+def test_button_bits() -> None:
+    from aqt.qt import Qt
+    from addon import codec, event
+
+    right = codec.BUTTON_BITS["right"]
+    left = codec.BUTTON_BITS["left"]
+    assert event.button_bits(Qt.MouseButton.RightButton) == right
+    assert (
+        event.button_bits(Qt.MouseButton.RightButton | Qt.MouseButton.LeftButton)
+        == right | left
+    )
+    # PyQt5 buttons are ints
+    assert event.button_bits(right | left) == right | left
+
+
+def test_mouse_press() -> None:
+    from aqt.qt import QEvent, QMouseEvent, QPointF, Qt
+    from addon import event
+
+    manager = event.manager
+    manager.side = event.SIDE_A
+    pos = QPointF(10, 10)
+    mouse_event = QMouseEvent(
+        QEvent.Type.MouseButtonPress,
+        pos,
+        pos,
+        Qt.MouseButton.RightButton,
+        Qt.MouseButton.RightButton | Qt.MouseButton.LeftButton,
+        Qt.KeyboardModifier.NoModifier,
+    )
+    try:
+        # `a_press_left_click_right` in default config
+        assert manager.on_mouse_press(mouse_event)
+        assert manager.executor.queue[-1][0] == "off"
+    finally:
+        manager.executor.queue.clear()
+        manager.side = event.SIDE_X
+
+
+def test_macro(monkeypatch: Any) -> None:
+    import sys
+    import types
+    from unittest.mock import Mock
+    from aqt import mw
+    from addon import event, macro
+
+    ops: List[Any] = []
+
+    class CollectionOp:
+        def __init__(self, parent: Any, op: Callable[[Any], Any]) -> None:
+            self.op = op
+
+        def success(self, on_success: Callable[[Any], None]) -> "CollectionOp":
+            self.on_success = on_success
+            return self
+
+        def run_in_background(self) -> None:
+            ops.append(self.op)
+            self.on_success(self.op(col))
+
+    operations = types.ModuleType("aqt.operations")
+    operations.CollectionOp = CollectionOp  # type: ignore
+    monkeypatch.setitem(sys.modules, "aqt.operations", operations)
+    col = Mock()
+    monkeypatch.setattr(mw, "col", col)
+    card = Mock(id=1, nid=2, user_flag=Mock(return_value=1))
+    monkeypatch.setattr(mw.reviewer, "card", card)
+    actions: List[str] = []
+    monkeypatch.setitem(event.ACTIONS, "good", lambda: actions.append("good"))
+    monkeypatch.setattr(
+        event, "config", event.config._replace(macros={"m": ["red", "good", "mark"]})
+    )
+    event.register_macros()
+    try:
+        event.ACTIONS["m"]()
+    finally:
+        monkeypatch.undo()
+        event.register_macros()
+    assert "m" not in event.ACTIONS
+    # one operation and undo entry, other steps run after it
+    assert len(ops) == 1
+    col.add_custom_undo_entry.assert_called_once()
+    col.merge_undo_entries.assert_called_once()
+    # red flag is removed from the red card
+    col.set_user_flag_for_cards.assert_called_once_with(0, [1])
+    assert actions == ["good"]
+
+
+def test_macro_old_anki(monkeypatch: Any) -> None:
+    """Before 2.1.45, there is no OpChanges and steps run one by one."""
+    import importlib
+    import sys
+    import types
+    from unittest.mock import Mock
+    from aqt import mw
+    import addon
+    import addon.macro
+
+    monkeypatch.setitem(sys.modules, "anki.collection", types.ModuleType("c"))
+    monkeypatch.delitem(sys.modules, "addon.macro")
+    monkeypatch.setattr(addon, "macro", addon.macro)
+    macro = importlib.import_module("addon.macro")
+    monkeypatch.setattr(mw, "col", Mock(spec=["sched"]))
+    monkeypatch.setattr(mw.reviewer, "card", Mock())
+    actions: List[str] = []
+    macro.run_macro(
+        "m",
+        ["bury_note", "good"],
+        {
+            "bury_note": lambda: actions.append("bury"),
+            "good": lambda: actions.append("good"),
+        },
+    )
+    assert actions == ["bury", "good"]
+
+
+def test_web_wheel_duplicate(monkeypatch: Any) -> None:
+    import time
+    from unittest.mock import Mock
+    import aqt
+    from aqt import mw
+    from aqt.qt import Qt
+    from addon import event
+    from addon.core import SOURCE_QT, SOURCE_WEB, WheelSources
+
+    manager = event.manager
+    monkeypatch.setattr(manager, "wheel_sources", WheelSources())
+    scrolls: List[Any] = []
+
+    def handle_scroll(*args: Any) -> bool:
+        scrolls.append(args)
+        return True
+
+    monkeypatch.setattr(manager, "handle_scroll", handle_scroll)
+    monkeypatch.setattr(mw, "app", Mock(mouseButtons=lambda: Qt.MouseButton.NoButton))
+    reviewer = Mock(spec=aqt.reviewer.Reviewer)
+    message = "ReviewHotmouse#wheel:-100"
+
+    assert event.handle_js_message((False, None), message, reviewer) == (True, True)
+    assert scrolls[0][:2] == (240, 0)
+    manager.wheel_sources.accept(SOURCE_QT, time.monotonic())
+    assert event.handle_js_message((False, None), message, reviewer) == (True, False)
+    assert len(scrolls) == 1
+    assert manager.wheel_sources.dropped[SOURCE_WEB] == 1
+
+
+def test_filter_only_while_reviewing(monkeypatch: Any) -> None:
+    from addon import event
+
+    installed: List[bool] = []
+    monkeypatch.setattr(event.manager, "add_menu", lambda: None)
+    monkeypatch.setattr(event.manager, "reviewing", False)
+    monkeypatch.setattr(
+        event, "install_focus_proxy_filters", lambda: installed.append(True)
+    )
+    monkeypatch.setattr(
+        event, "remove_focus_proxy_filters", lambda: installed.append(False)
+    )
+    monkeypatch.setattr(event.AnkiWebView, "contextMenuEvent", lambda *_: None)
+    event.install_event_handlers()
+    event.on_state_did_change("deckBrowser", "startup")
+    assert installed == []
+    event.on_state_did_change("review", "overview")
+    event.on_state_did_change("overview", "review")
+    assert installed == [True, False]
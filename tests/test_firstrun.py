@@ -0,0 +1,69 @@
+from typing import Any, Dict, List
+
+
+def count_writes(monkeypatch: Any) -> List[Dict[str, Any]]:
+    from aqt import mw
+
+    writes: List[Dict[str, Any]] = []
+    write = mw.addonManager.writeConfig
+
+    def write_config(module: str, data: Dict[str, Any]) -> None:
+        writes.append(data)
+        write(module, data)
+
+    monkeypatch.setattr(mw.addonManager, "writeConfig", write_config)
+    return writes
+
+
+def test_run_current_version(monkeypatch: Any) -> None:
+    from aqt import mw
+    from addon import firstrun, snapshot
+
+    monkeypatch.setenv("REVIEW_HOTMOUSE_VERSION", "2.14")
+    raw = mw.addonManager.getConfig(__name__)
+    raw["version"] = {"major": 2, "minor": 14}
+    mw.addonManager.writeConfig(__name__, raw)
+    snapshot.reload()
+    writes = count_writes(monkeypatch)
+    firstrun.run()
+    assert writes == []
+
+
+def test_run_migrates_once(monkeypatch: Any) -> None:
+    from aqt import mw
+    from addon import firstrun, snapshot
+
+    monkeypatch.setenv("REVIEW_HOTMOUSE_VERSION", "2.14")
+    mw.addonManager.writeConfig(
+        __name__,
+        {
+            "threshold_angle": 10,
+            "q_press_right": "good",
+            "q_wheel_down": "",
+        },
+    )
+    snapshot.reload()
+    writes = count_writes(monkeypatch)
+    firstrun.run()
+    assert writes == [
+        {
+            "threshold_angle": 10,
+            "shortcuts": {"q_click_right": "good", "q_wheel_down": "<none>"},
+            "version": {"major": 2, "minor": 14},
+        }
+    ]
+    assert snapshot.get().version == (2, 14)
+
+
+def test_run_new_install(monkeypatch: Any) -> None:
+    from aqt import mw
+    from addon import firstrun, snapshot
+
+    monkeypatch.setenv("REVIEW_HOTMOUSE_VERSION", "2.14")
+    default = dict(mw.addonManager.getConfig(__name__))
+    snapshot.reload()
+    writes = count_writes(monkeypatch)
+    firstrun.run()
+    assert len(writes) == 1
+    assert writes[0]["shortcuts"] == default["shortcuts"]
+    assert writes[0]["version"] == {"major": 2, "minor": 14}
@@ -0,0 +1,31 @@
+from typing import Any
+
+
+def test_config_ui_is_lazy(monkeypatch: Any) -> None:
+    import importlib
+    import sys
+    import addon
+
+    for name in list(sys.modules):
+        if name == "addon.config" or name.startswith("addon.ankiaddonconfig"):
+            monkeypatch.delitem(sys.modules, name)
+    importlib.reload(addon)
+    assert "addon.config" not in sys.modules
+    assert addon.event.latency.import_ms > 0
+
+
+def test_core_without_qt() -> None:
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    code = (
+        "import sys\n"
+        "sys.modules['aqt'] = None\n"
+        "before = set(sys.modules)\n"
+        "from addon import core\n"
+        "assert not any('Qt' in m for m in set(sys.modules) - before)\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).parent.parent, check=True
+    )
@@ -0,0 +1,31 @@
+def test_ring_buffer() -> None:
+    from addon.latency import RingBuffer
+
+    buf = RingBuffer(4)
+    assert buf.percentile(50) == 0
+    for value in range(10):
+        buf.add(float(value))
+    # only last 4 values are kept
+    assert buf.count == 10
+    assert buf.percentile(0) == 6
+    assert buf.percentile(50) == 8
+    assert buf.percentile(99) == 9
+
+
+def test_latency_recorder() -> None:
+    from addon.latency import LatencyRecorder
+
+    recorder = LatencyRecorder()
+    recorder.start()
+    recorder.mark()
+    trace = recorder.take()
+    assert trace is not None and len(trace) == 3
+    trace.extend((trace[-1], trace[-1]))
+    recorder.action_done("good", trace)
+    recorder.card_shown()
+    assert recorder.histograms["good"]["render"].count == 1
+    assert recorder.histograms["good"]["total"].count == 1
+
+    # incomplete trace
+    recorder.mark()
+    assert recorder.take() is None
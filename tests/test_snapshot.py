@@ -0,0 +1,35 @@
+def test_snapshot_reload() -> None:
+    from aqt import mw
+    from addon import snapshot
+
+    snapshot.reload()
+    conf = snapshot.get()
+    assert conf.shortcuts["a_wheel_down"] == "good"
+    assert conf.threshold_wheel_ms == 350
+
+    # unchanged content
+    assert not snapshot.reload()
+    assert snapshot.get().digest == conf.digest
+
+    raw = mw.addonManager.getConfig(__name__)
+    raw["shortcuts"]["a_wheel_down"] = "easy"
+    mw.addonManager.writeConfig(__name__, raw)
+    assert snapshot.reload()
+    assert snapshot.get().shortcuts["a_wheel_down"] == "easy"
+    assert snapshot.get().digest != conf.digest
+
+
+def test_snapshot_profiles() -> None:
+    from aqt import mw
+    from addon import snapshot
+
+    raw = mw.addonManager.getConfig(__name__)
+    raw["profiles"] = {
+        "scroll": {"decks": ["Anatomy"], "shortcuts": {"a_click_right": "good"}}
+    }
+    mw.addonManager.writeConfig(__name__, raw)
+    snapshot.reload()
+    profile = snapshot.get().profiles["scroll"]
+    assert profile.decks == ("Anatomy",)
+    assert profile.note_types == ()
+    assert profile.shortcuts == {"a_click_right": "good"}